@@ -1,65 +1,142 @@
 # app.py - HRIS Application with Payroll + Attrition Prediction + Trigger System
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import (
+    Flask, render_template, request, redirect, url_for, session, flash, jsonify,
+    Response, stream_with_context, make_response
+)
 from models import (
-    bcrypt, seed_sample_data, find_user_by_email, insert_user,
-    list_employees, list_payroll, list_attendance, get_employee_by_id,
-    train_and_save_model, load_model,
-    train_attrition_model, load_attrition_model,
+    seed_sample_data, find_user_by_email, insert_user, get_employee_by_id,
+    page_employees, iter_employees, DEFAULT_PAGE_SIZE,
+    train_models, payroll_registry, attrition_registry,
     db
 )
-import os
-from bson import ObjectId
+from risk_store import get_risk_scores
+from stats import dashboard_stats
+from triggers import ensure_trigger_indexes, get_recent_triggers
+from scheduler import scheduler, last_scoring_run, risk_counts, ATTRITION_RISK_PROB
+from warmup import Warmup
+from passwords import PasswordPoolBusy
+import passwords
+from batching import MicroBatcher
+from feature_store import api_feature_row
+import feature_store
+import attendance_rollup
+import bulk_io
+import payroll_run
+import read_models
+import cache
+import db_metrics
+import profiling
+import serialize
+from profiling import phase
+from config import (
+    LAZY_STARTUP, WARMUP_WAIT_SECONDS, ATTENDANCE_VIEW_LIMIT, SECRET_KEY, SCHEDULER_ENABLED,
+    METRICS_HEADER, METRICS_TOKEN
+)
+import hmac
+import io
 import warnings
-from sklearn.exceptions import DataConversionWarning
-import pandas as pd
 
-# Suppress sklearn warnings
+# Suppress sklearn warnings (DataConversionWarning is a UserWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
-warnings.filterwarnings("ignore", category=DataConversionWarning)
 
 # -------------------- FLASK INIT --------------------
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+app.secret_key = SECRET_KEY
+profiling.init_app(app)              # Server-Timing, request logs, opt-in cProfile
 
 # -------------------- DATABASE + MODELS --------------------
-# Seed DB and train both models once
-seed_sample_data()
-payroll_model = train_and_save_model()        # Payroll anomaly / risk model
-attrition_model = train_attrition_model()     # Attrition risk model
-
-# -------------------- TRIGGER SYSTEM --------------------
-def add_trigger(event_type, message, employee_id=None):
-    """Insert a trigger record in the database"""
-    trigger_doc = {
-        "event_type": event_type,
-        "message": message,
-        "employee_id": employee_id,
-        "timestamp": pd.Timestamp.now().isoformat()
-    }
-    db.triggers.insert_one(trigger_doc)
-    print(f"⚡ Trigger fired: {event_type} → {message}")
-
-def get_recent_triggers(limit=10):
-    """Get the most recent triggers"""
-    return list(db.triggers.find().sort("timestamp", -1).limit(limit))
-
-# -------------------- UTIL --------------------
-def clean_mongo_docs(docs):
-    """Convert MongoDB ObjectIds to strings for JSON/template safety."""
-    cleaned = []
-    for d in docs:
-        d = dict(d)
-        if "_id" in d:
-            d["_id"] = str(d["_id"])
-        cleaned.append(d)
-    return cleaned
+def warm_up():
+    """Seed DB and train/load both models once."""
+    seed_sample_data()
+    ensure_trigger_indexes()
+    feature_store.ensure_feature_indexes()
+    attendance_rollup.ensure_rollup_indexes()
+    # One-off backfill for attendance loaded before rollups existed
+    if db.attendance_rollups.estimated_document_count() == 0 and db.attendance.estimated_document_count():
+        attendance_rollup.rebuild_rollups()
+    # Same for payroll rows (seed data) written before run summaries existed
+    if db.payroll_runs.estimated_document_count() == 0 and db.payroll.estimated_document_count():
+        payroll_run.refresh_summaries()
+    feature_store.refresh()       # Reconcile features with employee docs
+    train_models()                # Payroll anomaly + attrition risk models
+    if SCHEDULER_ENABLED:
+        scheduler.start()         # Scoring + triggers run off the request path
+
+# With LAZY_STARTUP the import returns immediately and warm-up runs on a
+# background thread; ML routes wait for it (bounded) via models_ready()
+warmup = Warmup(warm_up)
+warmup.start(background=LAZY_STARTUP)
+
+def models_ready():
+    return warmup.wait(WARMUP_WAIT_SECONDS)
+
+def warming_up_response():
+    """503 answer for API callers while models are still loading."""
+    resp = jsonify({"status": warmup.status()})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "5"
+    return resp
+
+def busy_response(template):
+    """503 for a login/register form while the password pool is saturated."""
+    flash('Too many sign-ins right now, please try again in a moment.', 'warning')
+    resp = make_response(render_template(template), 503)
+    resp.headers["Retry-After"] = "2"
+    return resp
 
 # -------------------- ROUTES --------------------
 @app.route('/')
 def index():
     return render_template('index.html')
 
+# -------------------- HEALTH --------------------
+@app.route('/health/live')
+def health_live():
+    return jsonify({"status": "ok"})
+
+@app.route('/health/ready')
+def health_ready():
+    status = warmup.status()
+    body = {"status": status}
+    if warmup.error is not None:
+        body["error"] = str(warmup.error)
+    return jsonify(body), (200 if status == "ready" else 503)
+
+# -------------------- METRICS (HR or token) --------------------
+def metrics_allowed(sess, headers):
+    """HR session, or the metrics token header when one is configured (shared with async_app)."""
+    if "user" in sess and sess["user"].get("role") == "hr":
+        return True
+    token = headers.get(METRICS_HEADER, "")
+    return bool(METRICS_TOKEN) and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+
+@app.before_request
+def guard_metrics():
+    if request.path.startswith("/metrics/") and not metrics_allowed(session, request.headers):
+        return jsonify({"error": "forbidden"}), 403
+
+@app.route('/metrics/cache')
+def metrics_cache():
+    return jsonify(cache.all_stats())
+
+@app.route('/metrics/db')
+def metrics_db():
+    """Per-command / per-helper latency histograms and pool checkout wait."""
+    return jsonify(db_metrics.metrics.snapshot())
+
+@app.route('/metrics/db/reset', methods=['POST'])
+def metrics_db_reset():
+    """Return the current window and start a new one."""
+    snapshot = db_metrics.metrics.snapshot()
+    db_metrics.metrics.reset()
+    return jsonify(snapshot)
+
+@app.route('/metrics/scheduler')
+def metrics_scheduler():
+    """In-process scheduler state plus the last pass recorded by any process."""
+    return jsonify({**scheduler.status(), "last_recorded": last_scoring_run()})
+
 # -------------------- HR LOGIN --------------------
 @app.route('/login/hr', methods=['GET', 'POST'])
 def login_hr():
@@ -67,7 +144,11 @@ def login_hr():
         email = request.form['email']
         pwd = request.form['password']
         user = find_user_by_email(email)
-        if user and user.get('role') == 'hr' and bcrypt.check_password_hash(user['password'], pwd):
+        try:
+            ok = user and user.get('role') == 'hr' and passwords.pool.check(user.get('password'), pwd)
+        except PasswordPoolBusy:
+            return busy_response('login_hr.html')
+        if ok:
             session['user'] = {'email': user['email'], 'role': 'hr', 'name': user.get('name')}
             return redirect(url_for('hr_dashboard'))
         flash('Invalid HR credentials', 'danger')
@@ -80,7 +161,11 @@ def login_employee():
         email = request.form['email']
         pwd = request.form['password']
         user = find_user_by_email(email)
-        if user and user.get('role') == 'employee' and bcrypt.check_password_hash(user['password'], pwd):
+        try:
+            ok = user and user.get('role') == 'employee' and passwords.pool.check(user.get('password'), pwd)
+        except PasswordPoolBusy:
+            return busy_response('login_employee.html')
+        if ok:
             session['user'] = {
                 'email': user['email'],
                 'role': 'employee',
@@ -91,121 +176,80 @@ def login_employee():
         flash('Invalid employee credentials', 'danger')
     return render_template('login_employee.html')
 
-def to_bool(value):
-    """Normalize salary_pending values from DB to True/False."""
-    if value is True:
-        return True
-    if str(value).strip().lower() in ["true", "1", "pending", "yes"]:
-        return True
-    return False
-
-
 # -------------------- HR DASHBOARD --------------------
 @app.route('/hr/dashboard')
 def hr_dashboard():
-    global payroll_model, attrition_model
-
     # Access control
     if "user" not in session or session["user"].get("role") != "hr":
         return redirect(url_for("login_hr"))
 
-    # Fetch data
-    employees = clean_mongo_docs(list_employees())
-    attendance = clean_mongo_docs(list_attendance())
-    real_payroll = clean_mongo_docs(list_payroll())  # REAL payroll from DB
+    if not models_ready():
+        return render_template("warming_up.html", status=warmup.status()), 503
+
+    # Paging + filters
+    after = request.args.get("after") or None
+    department = request.args.get("department") or None
+    page_size = request.args.get("page_size", DEFAULT_PAGE_SIZE, type=int)
+
+    # Fetch one page of employees
+    with phase("page"):
+        employees, next_after = page_employees(after=after, page_size=page_size, department=department)
 
     # ----------------------------- 
     # DYNAMIC PAYROLL FOR CHART ONLY
     # -----------------------------
     chart_payroll = [{
         "employee_id": e["employee_id"],
-        "amount": e["salary"]
+        "amount": e.get("salary") or 0
     } for e in employees]
 
     # -----------------------------
-    # STATISTICS
+    # STATISTICS (aggregation pipelines inside MongoDB)
     # -----------------------------
-    total_employees = len(employees)
-
-    # Pending payroll based on REAL payroll collection
-    pending_payroll = sum(
-        1 for p in real_payroll if p.get("status") == "pending"
-    )
-
-    avg_salary = sum(
-        e.get("salary", 0) for e in employees
-    ) / max(1, total_employees)
+    with phase("stats"):
+        stats = dashboard_stats(department)
 
     # -----------------------------
     # MACHINE LEARNING PREDICTIONS
     # -----------------------------
-    preds = []
-
+    # Keyed by employee_id so the template does O(1) lookups per row
+    with phase("risk_reads"):
+        scores = get_risk_scores(e["employee_id"] for e in employees)
+        triggers = get_recent_triggers()
+        scoring = last_scoring_run()
+    # Tallied by the last scoring pass rather than counted per page load
+    payroll_risk_count, attrition_risk_count = risk_counts(scoring, department)
+    preds_by_id = {}
     for e in employees:
-        X = [[
-            e.get("tenure_years", 0),
-            e.get("salary", 30000),
-            {"Excellent": 3, "Good": 2, "Average": 1, "Below Average": 0}
-                .get(e.get("performance", "Average"), 1),
-            e.get("absence_count", 0)
-        ]]
-
-        # ---- Payroll anomaly ----
-        payroll_pred = int(payroll_model.predict(X)[0])
-
-        # ---- Attrition prediction ----
-        attr_prob = float(attrition_model.predict_proba(X)[0][1])
-        attrition_pred = int(attr_prob > 0.5)
-
-        preds.append({
+        score = scores.get(e["employee_id"])
+        if score is None:
+            continue            # not scored yet; the template says so
+        attr_prob = score.get("attrition_prob", 0.0)
+        preds_by_id[e["employee_id"]] = {
             "employee_id": e["employee_id"],
             "name": e["name"],
-            "payroll_risk": bool(payroll_pred),
-            "attrition_risk": bool(attrition_pred),
+            "payroll_risk": bool(score.get("payroll_risk", False)),
+            "attrition_risk": attr_prob > ATTRITION_RISK_PROB,
             "attrition_prob": round(attr_prob, 2)
-        })
-
-        # -----------------------------
-        # TRIGGERS
-        # -----------------------------
-        if attr_prob > 0.8:
-            add_trigger(
-                event_type="High Attrition Risk",
-                message=f"Employee {e['name']} ({e['employee_id']}) shows {attr_prob*100:.1f}% chance of leaving.",
-                employee_id=e["employee_id"]
-            )
-
-        if payroll_pred == 1:
-            add_trigger(
-                event_type="Payroll Anomaly",
-                message=f"Payroll irregularity detected for {e['name']} ({e['employee_id']}).",
-                employee_id=e["employee_id"]
-            )
-
-        if e.get("absence_count", 0) > 5:
-            add_trigger(
-                event_type="High Absence",
-                message=f"{e['name']} ({e['employee_id']}) has {e['absence_count']} absences.",
-                employee_id=e["employee_id"]
-            )
-
-    payroll_risk_count = sum(1 for r in preds if r["payroll_risk"])
-    attrition_risk_count = sum(1 for r in preds if r["attrition_risk"])
-    triggers = get_recent_triggers()
+        }
+
 
     return render_template(
         "hr_dashboard.html",
         employees=employees,
         payroll_chart=chart_payroll,   # for Chart.js
-        payroll=real_payroll,          # real payroll records
-        attendance=attendance,
-        total_employees=total_employees,
-        pending_payroll=pending_payroll,
-        avg_salary=int(avg_salary),
-        preds=preds,
+        total_employees=stats["total_employees"],
+        pending_payroll=stats["pending_payroll"],
+        avg_salary=stats["avg_salary"],
+        departments=stats["departments"],
+        preds_by_id=preds_by_id,
         payroll_risk_count=payroll_risk_count,
         attrition_risk_count=attrition_risk_count,
-        triggers=triggers
+        triggers=triggers,
+        scoring=scoring,
+        department=department,
+        page_size=page_size,
+        next_after=next_after
     )
 
 # -------------------- EMPLOYEE DASHBOARD --------------------
@@ -214,13 +258,9 @@ def employee_dashboard():
     if 'user' not in session or session['user'].get('role') != 'employee':
         return redirect(url_for('login_employee'))
 
-    user_email = session['user']['email']
-    user_doc = db.users.find_one({"email": user_email})
-    emp = None
-    if user_doc:
-        emp = db.employees.find_one({"employee_id": user_doc.get('employee_id')})
-    if emp and "_id" in emp:
-        emp["_id"] = str(emp["_id"])
+    # employee_id is stored in the session at login; the document is cached
+    eid = session['user'].get('employee_id')
+    emp = get_employee_by_id(eid) if eid else None
     return render_template('employee_dashboard.html', user=session['user'], employee=emp)
 
 # -------------------- EMPLOYEE VIEW (HR SIDE) --------------------
@@ -228,39 +268,169 @@ def employee_dashboard():
 def employee_view(eid):
     if 'user' not in session or session['user'].get('role') != 'hr':
         return redirect(url_for('login_hr'))
-    emp = get_employee_by_id(eid)
-    payrolls = clean_mongo_docs(list(db.payroll.find({"employee_id": eid})))
-    attendance = clean_mongo_docs(list(db.attendance.find({"employee_id": eid}).sort("date", 1)))
-    return render_template('employee_view.html', emp=emp, payrolls=payrolls, attendance=attendance)
+
+    # Cached read model, keyed by the employee's write generation (no
+    # queries while cached) + date-bounded attendance
+    profile = read_models.employee_profile(eid)
+    if profile is None:
+        return render_template('employee_view.html', emp=None, payrolls=[], rollup=None,
+                               attendance=[], next_before=None)
+    attendance = read_models.attendance_range(
+        eid,
+        date_from=request.args.get("from") or None,
+        date_to=request.args.get("to") or None,
+        before=request.args.get("before") or None,
+        limit=request.args.get("page_size", ATTENDANCE_VIEW_LIMIT, type=int)
+    )
+
+    # Conditional GET: repeat views of an unchanged profile return 304
+    # without rendering the page
+    etag = read_models.view_etag(profile, attendance)
+    if request.if_none_match.contains(etag):
+        resp = make_response("", 304)
+    else:
+        resp = make_response(render_template(
+            'employee_view.html',
+            emp=profile["data"]["emp"],
+            payrolls=profile["data"]["payrolls"],
+            rollup=profile["data"]["rollup"],
+            attendance=attendance["data"]["attendance"],
+            next_before=attendance["data"]["next_before"]
+        ))
+    resp.set_etag(etag)
+    resp.last_modified = max(profile["last_modified"], attendance["last_modified"])
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+# -------------------- API: EMPLOYEES --------------------
+@app.route('/api/employees')
+def api_employees():
+    """Every employee (optionally ?department=) as one streamed JSON array."""
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return jsonify({"error": "HR login required"}), 401
+    employees = iter_employees(request.args.get("department") or None)
+    return Response(stream_with_context(serialize.stream_array(employees)), mimetype="application/json")
+
+# -------------------- API: BATCHED INFERENCE --------------------
+# Concurrent API calls share one predict_proba per model within a few ms
+payroll_batcher = MicroBatcher(payroll_registry.get, name="payroll-batcher")
+attrition_batcher = MicroBatcher(attrition_registry.get, name="attrition-batcher")
+
+def api_feature_rows(single=False):
+    """
+    Feature rows from a request body: a JSON array of payloads, or with
+    single=True one payload (an empty body means all defaults).
+    """
+    data = request.get_json(silent=True)
+    if single:
+        if data is None and not request.get_data():
+            data = {}
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(d, dict) for d in data):
+        raise ValueError("expected a JSON object of features" if single
+                         else "expected a JSON array of feature objects")
+    return [api_feature_row(d) for d in data]
 
 # -------------------- API: PAYROLL RISK --------------------
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
-    data = request.get_json() or {}
-    X = [[
-        int(data.get('tenure', 0)),
-        int(data.get('salary', 30000)),
-        int(data.get('perf_score', 1)),
-        int(data.get('absence', 0))
-    ]]
-    pred = int(payroll_model.predict(X)[0])
-    prob = float(payroll_model.predict_proba(X)[0][1]) if hasattr(payroll_model, "predict_proba") else 0.0
+    if not models_ready():
+        return warming_up_response()
+    try:
+        rows = api_feature_rows(single=True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    [(pred, prob)] = payroll_batcher.predict(rows)
     return jsonify({"risk": bool(pred), "probability": round(prob, 3)})
 
+@app.route('/api/predict/bulk', methods=['POST'])
+def api_predict_bulk():
+    if not models_ready():
+        return warming_up_response()
+    try:
+        rows = api_feature_rows()
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    results = payroll_batcher.predict(rows)
+    return jsonify([{"risk": bool(pred), "probability": round(prob, 3)} for pred, prob in results])
+
 # -------------------- API: ATTRITION RISK --------------------
 @app.route('/api/attrition_predict', methods=['POST'])
 def api_attrition_predict():
-    data = request.get_json() or {}
-    X = [[
-        int(data.get('tenure', 0)),
-        int(data.get('salary', 30000)),
-        int(data.get('perf_score', 1)),
-        int(data.get('absence', 0))
-    ]]
-    pred = int(attrition_model.predict(X)[0])
-    prob = float(attrition_model.predict_proba(X)[0][1]) if hasattr(attrition_model, "predict_proba") else 0.0
+    if not models_ready():
+        return warming_up_response()
+    try:
+        rows = api_feature_rows(single=True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    [(pred, prob)] = attrition_batcher.predict(rows)
     return jsonify({"attrition_risk": bool(pred), "probability": round(prob, 3)})
 
+@app.route('/api/attrition_predict/bulk', methods=['POST'])
+def api_attrition_predict_bulk():
+    if not models_ready():
+        return warming_up_response()
+    try:
+        rows = api_feature_rows()
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    results = attrition_batcher.predict(rows)
+    return jsonify([{"attrition_risk": bool(pred), "probability": round(prob, 3)} for pred, prob in results])
+
+# -------------------- BULK IMPORT / EXPORT (HR) --------------------
+@app.route('/hr/import/<collection>', methods=['POST'])
+def hr_import(collection):
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return jsonify({"error": "forbidden"}), 403
+    if collection not in bulk_io.SCHEMAS:
+        return jsonify({"error": f"unknown collection '{collection}'"}), 404
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "no file uploaded"}), 400
+    fmt = request.form.get('format') or bulk_io.detect_format(upload.filename)
+    stream = io.TextIOWrapper(upload.stream, encoding="utf-8", newline="")
+    report = bulk_io.import_stream(collection, stream, fmt)
+    return jsonify(report)
+
+@app.route('/hr/export/<collection>')
+def hr_export(collection):
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return redirect(url_for('login_hr'))
+    if collection not in bulk_io.SCHEMAS:
+        return jsonify({"error": f"unknown collection '{collection}'"}), 404
+    fmt = "jsonl" if request.args.get("format") == "jsonl" else "csv"
+    mimetype = "application/x-ndjson" if fmt == "jsonl" else "text/csv"
+    return Response(
+        stream_with_context(bulk_io.export_rows(collection, fmt)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={collection}.{fmt}"}
+    )
+
+# -------------------- PAYROLL RUNS (HR) --------------------
+@app.route('/hr/payroll/runs', methods=['GET', 'POST'])
+def hr_payroll_runs():
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return jsonify({"error": "forbidden"}), 403
+    if request.method == 'GET':
+        return jsonify(payroll_run.recent_runs(request.args.get("limit", 12, type=int)))
+    try:
+        report = payroll_run.generate_run(request.form.get('month') or request.args.get('month', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(report)
+
+@app.route('/hr/payroll/runs/<month>/<status>', methods=['POST'])
+def hr_payroll_advance(month, status):
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return jsonify({"error": "forbidden"}), 403
+    employee_ids = request.form.getlist('employee_id') or None
+    try:
+        moved = payroll_run.advance(month, status, employee_ids)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"month": month, "status": status, "moved": moved, "run": payroll_run.get_run(month)})
+
 # -------------------- REGISTER --------------------
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -269,7 +439,10 @@ def register():
         email = request.form['email']
         password = request.form['password']
         role = request.form.get('role', 'employee')
-        hashed = bcrypt.generate_password_hash(password).decode('utf-8')
+        try:
+            hashed = passwords.pool.hash(password)
+        except PasswordPoolBusy:
+            return busy_response('register.html')
         insert_user({'name': name, 'email': email, 'password': hashed, 'role': role})
         flash('User registered. You can login now.', 'success')
         return redirect(url_for('index'))
@@ -0,0 +1,343 @@
+# async_app.py - Async (ASGI) serving mode: Quart + Motor
+#
+# Serves the dashboards, employee views and JSON APIs with independent
+# MongoDB reads issued concurrently. Blocking work (risk scoring, bcrypt)
+# runs in a bounded executor; model inference goes through the same
+# micro-batchers as app.py. Warm-up, writes and bulk import/export stay
+# on the sync app, which remains the default server.
+#
+#     hypercorn async_app:app --bind 0.0.0.0:8000
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, render_template, request, redirect, url_for, session, flash, jsonify, make_response
+
+import app as sync_app               # shared warm-up, scheduler and batchers
+import async_models as adb
+import cache
+import db_metrics
+import passwords
+import read_models
+from config import (
+    SECRET_KEY, WARMUP_WAIT_SECONDS, ATTENDANCE_VIEW_LIMIT, ASYNC_EXECUTOR_WORKERS, PASSWORD_TIMEOUT_SECONDS
+)
+from feature_store import api_feature_row
+from models import DEFAULT_PAGE_SIZE, insert_user
+from passwords import PasswordPoolBusy
+from scheduler import risk_counts, ATTRITION_RISK_PROB
+
+# -------------------- QUART INIT --------------------
+app = Quart(__name__)
+app.secret_key = SECRET_KEY          # same key as app.py, so sessions work on both
+
+executor = ThreadPoolExecutor(max_workers=ASYNC_EXECUTOR_WORKERS, thread_name_prefix="hris-async")
+
+
+async def blocking(fn, *args):
+    """Run a blocking call on the bounded executor."""
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+async def pooled(fut):
+    """
+    Await a password pool job (passwords.pool.submit_*) directly, so it is
+    bounded by the pool's own queue limit rather than the generic executor.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(fut), PASSWORD_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        passwords.pool.timed_out += 1
+        raise PasswordPoolBusy() from None
+
+
+@app.after_serving
+async def shutdown():
+    adb.close()
+    executor.shutdown(wait=False)
+
+
+async def models_ready():
+    return await blocking(sync_app.warmup.wait, WARMUP_WAIT_SECONDS)
+
+
+def warming_up_response():
+    return jsonify({"status": sync_app.warmup.status()}), 503, {"Retry-After": "5"}
+
+
+async def busy_response(template):
+    await flash('Too many sign-ins right now, please try again in a moment.', 'warning')
+    return await render_template(template), 503, {"Retry-After": "2"}
+
+
+# -------------------- ROUTES --------------------
+@app.route('/')
+async def index():
+    return await render_template('index.html')
+
+# -------------------- HEALTH --------------------
+@app.route('/health/live')
+async def health_live():
+    return jsonify({"status": "ok"})
+
+@app.route('/health/ready')
+async def health_ready():
+    status = sync_app.warmup.status()
+    body = {"status": status}
+    if sync_app.warmup.error is not None:
+        body["error"] = str(sync_app.warmup.error)
+    return jsonify(body), (200 if status == "ready" else 503)
+
+@app.before_request
+async def guard_metrics():
+    if request.path.startswith("/metrics/") and not sync_app.metrics_allowed(session, request.headers):
+        return jsonify({"error": "forbidden"}), 403
+
+@app.route('/metrics/cache')
+async def metrics_cache():
+    return jsonify(cache.all_stats())
+
+@app.route('/metrics/db')
+async def metrics_db():
+    """Per-command / per-helper latency histograms and pool checkout wait."""
+    return jsonify(db_metrics.metrics.snapshot())
+
+@app.route('/metrics/db/reset', methods=['POST'])
+async def metrics_db_reset():
+    """Return the current window and start a new one."""
+    snapshot = db_metrics.metrics.snapshot()
+    db_metrics.metrics.reset()
+    return jsonify(snapshot)
+
+@app.route('/metrics/scheduler')
+async def metrics_scheduler():
+    """In-process scheduler state plus the last pass recorded by any process."""
+    return jsonify({**sync_app.scheduler.status(), "last_recorded": await adb.last_scoring_run()})
+
+# -------------------- LOGIN --------------------
+async def check_login(role):
+    form = await request.form
+    user = await adb.find_user_by_email(form['email'])
+    if not user or user.get('role') != role:
+        return None
+    if not await pooled(passwords.pool.submit_check(user.get('password'), form['password'])):
+        return None
+    return user
+
+@app.route('/login/hr', methods=['GET', 'POST'])
+async def login_hr():
+    if request.method == 'POST':
+        try:
+            user = await check_login('hr')
+        except PasswordPoolBusy:
+            return await busy_response('login_hr.html')
+        if user:
+            session['user'] = {'email': user['email'], 'role': 'hr', 'name': user.get('name')}
+            return redirect(url_for('hr_dashboard'))
+        await flash('Invalid HR credentials', 'danger')
+    return await render_template('login_hr.html')
+
+@app.route('/login/employee', methods=['GET', 'POST'])
+async def login_employee():
+    if request.method == 'POST':
+        try:
+            user = await check_login('employee')
+        except PasswordPoolBusy:
+            return await busy_response('login_employee.html')
+        if user:
+            session['user'] = {
+                'email': user['email'],
+                'role': 'employee',
+                'name': user.get('name'),
+                'employee_id': user.get('employee_id')
+            }
+            return redirect(url_for('employee_dashboard'))
+        await flash('Invalid employee credentials', 'danger')
+    return await render_template('login_employee.html')
+
+# -------------------- HR DASHBOARD --------------------
+@app.route('/hr/dashboard')
+async def hr_dashboard():
+    if "user" not in session or session["user"].get("role") != "hr":
+        return redirect(url_for("login_hr"))
+
+    if not await models_ready():
+        return await render_template("warming_up.html", status=sync_app.warmup.status()), 503
+
+    after = request.args.get("after") or None
+    department = request.args.get("department") or None
+    page_size = request.args.get("page_size", DEFAULT_PAGE_SIZE, type=int)
+
+    # Pure read: scores and triggers are written by the background scheduler
+    (employees, next_after), stats, triggers, scoring = await asyncio.gather(
+        adb.page_employees(after=after, page_size=page_size, department=department),
+        adb.dashboard_stats(department),
+        adb.get_recent_triggers(),
+        adb.last_scoring_run(),
+    )
+    payroll_risk_count, attrition_risk_count = risk_counts(scoring, department)
+    scores = await adb.get_risk_scores(e["employee_id"] for e in employees)
+
+    preds_by_id = {}
+    for e in employees:
+        score = scores.get(e["employee_id"])
+        if score is None:
+            continue            # not scored yet; the template says so
+        attr_prob = score.get("attrition_prob", 0.0)
+        preds_by_id[e["employee_id"]] = {
+            "employee_id": e["employee_id"],
+            "name": e["name"],
+            "payroll_risk": bool(score.get("payroll_risk", False)),
+            "attrition_risk": attr_prob > ATTRITION_RISK_PROB,
+            "attrition_prob": round(attr_prob, 2)
+        }
+
+    return await render_template(
+        "hr_dashboard.html",
+        employees=employees,
+        payroll_chart=[{"employee_id": e["employee_id"], "amount": e.get("salary") or 0} for e in employees],
+        total_employees=stats["total_employees"],
+        pending_payroll=stats["pending_payroll"],
+        avg_salary=stats["avg_salary"],
+        departments=stats["departments"],
+        preds_by_id=preds_by_id,
+        payroll_risk_count=payroll_risk_count,
+        attrition_risk_count=attrition_risk_count,
+        triggers=triggers,
+        scoring=scoring,
+        department=department,
+        page_size=page_size,
+        next_after=next_after
+    )
+
+# -------------------- EMPLOYEE DASHBOARD --------------------
+@app.route('/employee/dashboard')
+async def employee_dashboard():
+    if 'user' not in session or session['user'].get('role') != 'employee':
+        return redirect(url_for('login_employee'))
+    eid = session['user'].get('employee_id')
+    emp = await adb.get_employee_by_id(eid) if eid else None
+    return await render_template('employee_dashboard.html', user=session['user'], employee=emp)
+
+# -------------------- EMPLOYEE VIEW (HR SIDE) --------------------
+@app.route('/employee/<eid>')
+async def employee_view(eid):
+    if 'user' not in session or session['user'].get('role') != 'hr':
+        return redirect(url_for('login_hr'))
+
+    profile, attendance = await asyncio.gather(
+        adb.employee_profile(eid),
+        adb.attendance_range(
+            eid,
+            date_from=request.args.get("from") or None,
+            date_to=request.args.get("to") or None,
+            before=request.args.get("before") or None,
+            limit=request.args.get("page_size", ATTENDANCE_VIEW_LIMIT, type=int)
+        ),
+    )
+    if profile is None:
+        return await render_template('employee_view.html', emp=None, payrolls=[], rollup=None,
+                                     attendance=[], next_before=None)
+
+    etag = read_models.view_etag(profile, attendance)
+    if request.if_none_match.contains(etag):
+        resp = await make_response("", 304)
+    else:
+        resp = await make_response(await render_template(
+            'employee_view.html',
+            emp=profile["data"]["emp"],
+            payrolls=profile["data"]["payrolls"],
+            rollup=profile["data"]["rollup"],
+            attendance=attendance["data"]["attendance"],
+            next_before=attendance["data"]["next_before"]
+        ))
+    resp.set_etag(etag)
+    resp.last_modified = max(profile["last_modified"], attendance["last_modified"])
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
+
+# -------------------- API: BATCHED INFERENCE --------------------
+async def batched_predict(batcher, rows):
+    """Await the shared micro-batcher without holding a thread."""
+    return await asyncio.wrap_future(batcher.submit(rows))
+
+async def api_feature_rows(single=False):
+    data = await request.get_json(silent=True)
+    if single:
+        if data is None and not await request.get_data():
+            data = {}
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(d, dict) for d in data):
+        raise ValueError("expected a JSON object of features" if single
+                         else "expected a JSON array of feature objects")
+    return [api_feature_row(d) for d in data]
+
+@app.route('/api/predict', methods=['POST'])
+async def api_predict():
+    if not await models_ready():
+        return warming_up_response()
+    try:
+        rows = await api_feature_rows(single=True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    [(pred, prob)] = await batched_predict(sync_app.payroll_batcher, rows)
+    return jsonify({"risk": bool(pred), "probability": round(prob, 3)})
+
+@app.route('/api/predict/bulk', methods=['POST'])
+async def api_predict_bulk():
+    if not await models_ready():
+        return warming_up_response()
+    try:
+        rows = await api_feature_rows()
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    results = await batched_predict(sync_app.payroll_batcher, rows)
+    return jsonify([{"risk": bool(pred), "probability": round(prob, 3)} for pred, prob in results])
+
+@app.route('/api/attrition_predict', methods=['POST'])
+async def api_attrition_predict():
+    if not await models_ready():
+        return warming_up_response()
+    try:
+        rows = await api_feature_rows(single=True)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    [(pred, prob)] = await batched_predict(sync_app.attrition_batcher, rows)
+    return jsonify({"attrition_risk": bool(pred), "probability": round(prob, 3)})
+
+@app.route('/api/attrition_predict/bulk', methods=['POST'])
+async def api_attrition_predict_bulk():
+    if not await models_ready():
+        return warming_up_response()
+    try:
+        rows = await api_feature_rows()
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    results = await batched_predict(sync_app.attrition_batcher, rows)
+    return jsonify([{"attrition_risk": bool(pred), "probability": round(prob, 3)} for pred, prob in results])
+
+# -------------------- REGISTER --------------------
+@app.route('/register', methods=['GET', 'POST'])
+async def register():
+    if request.method == 'POST':
+        form = await request.form
+        try:
+            hashed = await pooled(passwords.pool.submit_hash(form['password']))
+        except PasswordPoolBusy:
+            return await busy_response('register.html')
+        await blocking(insert_user, {'name': form['name'], 'email': form['email'],
+                                     'password': hashed, 'role': form.get('role', 'employee')})
+        await flash('User registered. You can login now.', 'success')
+        return redirect(url_for('index'))
+    return await render_template('register.html')
+
+# -------------------- LOGOUT --------------------
+@app.route('/logout')
+async def logout():
+    session.clear()
+    return redirect(url_for('index'))
+
+# -------------------- MAIN --------------------
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,129 @@
+# async_models.py - Motor (asyncio MongoDB) data layer for async_app.py
+#
+# Mirrors the read paths of models.py, stats.py, risk_store.py, triggers.py
+# scheduler.py and read_models.py so independent queries can be awaited together with
+# asyncio.gather. Writes, scoring and warm-up stay on the sync layer.
+
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from config import MONGO_URI, DB_NAME, MONGO_CLIENT_OPTIONS, DB_METRICS_ENABLED
+from models import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, user_cache, employee_cache
+from stats import employee_stats_pipeline, shape_employee_stats, PENDING_PAYROLL_PIPELINE
+from scheduler import LEASE_NAME
+from cache import MISSING
+import db_metrics
+import read_models
+
+_client = None
+
+
+def get_db():
+    """Database handle; the client is created on first use inside the running loop."""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(
+            MONGO_URI,
+            event_listeners=db_metrics.listeners() if DB_METRICS_ENABLED else [],
+            **MONGO_CLIENT_OPTIONS
+        )
+    return _client[DB_NAME]
+
+
+def close():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+# -------------------- USERS / EMPLOYEES --------------------
+async def find_user_by_email(email):
+    user = user_cache.get(email, MISSING)
+    if user is MISSING:
+        user = await get_db().users.find_one({"email": email}, {"_id": 0})
+        user_cache.set(email, user)
+    return user
+
+
+async def get_employee_by_id(eid):
+    emp = employee_cache.get(eid, MISSING)
+    if emp is MISSING:
+        emp = await get_db().employees.find_one({"employee_id": eid}, {"_id": 0})
+        employee_cache.set(eid, emp)
+    return emp
+
+
+async def page_employees(after=None, page_size=DEFAULT_PAGE_SIZE, department=None):
+    """Keyset page of employees ordered by employee_id (see models._page)."""
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = {"department": department} if department else {}
+    if after is not None:
+        query["employee_id"] = {"$gt": after}
+    docs = await get_db().employees.find(query, {"_id": 0}).sort("employee_id", 1).to_list(page_size + 1)
+    next_after = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_after = docs[-1]["employee_id"]
+    return docs, next_after
+
+
+# -------------------- DASHBOARD --------------------
+async def dashboard_stats(department=None):
+    db = get_db()
+    emp_result, pending = await asyncio.gather(
+        db.employees.aggregate(employee_stats_pipeline(department)).to_list(1),
+        db.payroll_runs.aggregate(PENDING_PAYROLL_PIPELINE).to_list(1),
+    )
+    stats = shape_employee_stats(emp_result[0] if emp_result else {})
+    stats["pending_payroll"] = pending[0]["pending"] if pending else 0
+    return stats
+
+
+async def get_risk_scores(employee_ids):
+    ids = list(employee_ids)
+    docs = await get_db().risk_scores.find({"employee_id": {"$in": ids}}, {"_id": 0}).to_list(None)
+    return {d["employee_id"]: d for d in docs}
+
+
+async def get_recent_triggers(limit=10):
+    return await get_db().triggers.find({}, {"_id": 0}).sort("timestamp", -1).to_list(limit)
+
+
+async def last_scoring_run():
+    doc = await get_db().scheduler_leases.find_one({"_id": LEASE_NAME}, {"_id": 0, "last_run": 1, "last_error": 1})
+    return doc or {}
+
+
+# -------------------- EMPLOYEE VIEW --------------------
+async def employee_profile(eid):
+    """read_models.employee_profile with the three lookups issued concurrently."""
+    key = read_models.profile_key(eid)
+    cached = read_models.profile_cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+    db = get_db()
+    emp, payrolls, rollup = await asyncio.gather(
+        db.employees.find_one({"employee_id": eid}, {"_id": 0}),
+        db.payroll.find({"employee_id": eid}, {"_id": 0}).sort("month", -1).to_list(None),
+        db.attendance_rollups.find_one({"employee_id": eid}, {"_id": 0, "ring": 0}),
+    )
+    profile = None if emp is None else read_models.stamp({"emp": emp, "payrolls": payrolls, "rollup": rollup})
+    read_models.profile_cache.set(key, profile)
+    return profile
+
+
+async def attendance_range(eid, date_from=None, date_to=None, before=None, limit=None):
+    limit = read_models.attendance_limit(limit)
+    key = read_models.attendance_key(eid, date_from, date_to, before, limit)
+    cached = read_models.attendance_cache.get(key, MISSING)
+    if cached is not MISSING:
+        return cached
+    rows = await (get_db().attendance
+                  .find(read_models.attendance_query(eid, date_from, date_to, before),
+                        {"_id": 0, "date": 1, "status": 1})
+                  .sort("date", -1).to_list(limit + 1))
+    page = read_models.attendance_page(rows, limit)
+    read_models.attendance_cache.set(key, page)
+    return page
@@ -0,0 +1,247 @@
+# attendance_rollup.py - Incremental per-employee attendance counters
+
+from collections import defaultdict
+from datetime import date
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import ABSENCE_COUNT_WINDOW_DAYS
+from models import db
+import feature_store
+import read_models
+
+# Rolling windows kept per employee; the ring buffer covers the largest
+WINDOWS = (30, 90)
+RING_DAYS = max(WINDOWS)
+
+# Attempts to write a recomputed rollup before giving up on a contended employee
+MAX_REBUILD_ATTEMPTS = 5
+
+
+def ensure_rollup_indexes():
+    db.attendance_rollups.create_index("employee_id", unique=True)
+
+
+def _ordinal(day):
+    return date.fromisoformat(day).toordinal()
+
+
+def _empty_rollup(eid):
+    return {
+        "employee_id": eid,
+        "total_present": 0,
+        "total_absent": 0,
+        "absent_streak": 0,
+        "last_date": None,
+        "ring": {},               # str(ordinal % RING_DAYS) -> [ordinal, absent]
+        "version": 0,             # bumped on every write (optimistic concurrency)
+    }
+
+
+def _ring_streak(rollup):
+    """
+    Consecutive absent records ending at last_date, from the ring buffer;
+    None if every day it holds is absent (the streak may reach further back).
+    """
+    last = _ordinal(rollup["last_date"])
+    streak = 0
+    for d, a in sorted((tuple(v) for v in rollup["ring"].values() if last - RING_DAYS < v[0] <= last),
+                       reverse=True):
+        if not a:
+            return streak
+        streak += 1
+    return None
+
+
+def _apply(rollup, day, absent, previous=None):
+    """
+    Fold one attendance row into a rollup in O(1) (O(RING_DAYS) for rows
+    at or before last_date). `previous` is the status the same (employee,
+    date) row had before, if any. Returns True if the rollup must be
+    rebuilt from attendance instead (see _ring_streak).
+    """
+    if previous is not None:
+        rollup["total_absent" if previous == "absent" else "total_present"] -= 1
+    rollup["total_absent" if absent else "total_present"] += 1
+
+    ordinal = _ordinal(day)
+    last = _ordinal(rollup["last_date"]) if rollup["last_date"] else None
+
+    # Ring buffer of the last RING_DAYS days, one slot per calendar day
+    if last is None or ordinal > last - RING_DAYS:
+        slot = str(ordinal % RING_DAYS)
+        held = rollup["ring"].get(slot)
+        if held is None or held[0] <= ordinal:
+            rollup["ring"][slot] = [ordinal, int(absent)]
+
+    # Streak of consecutive absent records ending at the latest record. A
+    # newer row extends or resets it; a back-filled or corrected row can
+    # change it anywhere, so it is recounted from the ring
+    if last is None or ordinal > last:
+        rollup["absent_streak"] = rollup["absent_streak"] + 1 if absent else 0
+        rollup["last_date"] = day
+        return False
+    streak = _ring_streak(rollup)
+    if streak is None:
+        return True
+    rollup["absent_streak"] = streak
+    return False
+
+
+def _window_counts(rollup):
+    """Absences in each rolling window ending at last_date (bounded by RING_DAYS)."""
+    if not rollup["last_date"]:
+        return {f"absent_{w}d": 0 for w in WINDOWS}
+    last = _ordinal(rollup["last_date"])
+    slots = [(d, a) for d, a in rollup["ring"].values()]
+    return {f"absent_{w}d": sum(a for d, a in slots if last - w < d <= last) for w in WINDOWS}
+
+
+def _versioned(rollup):
+    """
+    (filter, replacement) for an upsert that only matches the version the
+    rollup was read at (missing/0 for new or backfilled rollups) and bumps
+    it. If another writer got there first, the upsert hits the unique
+    employee_id index instead.
+    """
+    version = rollup.get("version") or 0
+    match = {"$in": [None, 0]} if version == 0 else version
+    return {"employee_id": rollup["employee_id"], "version": match}, {**rollup, "version": version + 1}
+
+
+def _rebuild_employee(eid):
+    """
+    Recompute one rollup from its attendance rows (already written, so
+    authoritative) after a concurrent update won the race, or when a
+    back-filled row's streak can't be told from the ring. Returns it.
+    """
+    for _ in range(MAX_REBUILD_ATTEMPTS):
+        current = db.attendance_rollups.find_one({"employee_id": eid}, {"_id": 0, "version": 1}) or {}
+        rollup = _empty_rollup(eid)
+        rollup["version"] = current.get("version") or 0
+        for r in db.attendance.find({"employee_id": eid}, {"_id": 0, "date": 1, "status": 1}).sort("date", 1):
+            _apply(rollup, r["date"], r.get("status") == "absent")
+        rollup.update(_window_counts(rollup))
+        match, doc = _versioned(rollup)
+        try:
+            db.attendance_rollups.replace_one(match, doc, upsert=True)
+            return doc
+        except DuplicateKeyError:
+            continue
+    raise RuntimeError(f"attendance rollup for {eid} kept changing; giving up")
+
+
+def record_attendance(records):
+    """
+    Upsert attendance rows and update the affected rollups without
+    rescanning attendance. Each record needs employee_id, date
+    (YYYY-MM-DD) and status. Rollups are written with a version check;
+    one changed by a concurrent import in the meantime is recomputed from
+    attendance instead. Returns the number of rows written.
+    """
+    records = [r for r in records if r.get("employee_id") and r.get("date")]
+    if not records:
+        return 0
+
+    by_emp = defaultdict(list)
+    for r in records:
+        by_emp[r["employee_id"]].append(r)
+    emp_ids = list(by_emp)
+
+    # Rollups are read before the attendance rows they summarize: a
+    # concurrent import that lands in between bumps their version, and the
+    # version check below catches it
+    rollups = {d["employee_id"]: d for d in db.attendance_rollups.find(
+        {"employee_id": {"$in": emp_ids}}, {"_id": 0})}
+
+    # Existing statuses for exactly these (employee, date) pairs
+    previous = {
+        (d["employee_id"], d["date"]): d.get("status")
+        for d in db.attendance.find(
+            {"employee_id": {"$in": emp_ids}, "date": {"$in": list({r["date"] for r in records})}},
+            {"_id": 0, "employee_id": 1, "date": 1, "status": 1}
+        )
+    }
+
+    db.attendance.bulk_write([
+        UpdateOne({"employee_id": r["employee_id"], "date": r["date"]}, {"$set": r}, upsert=True)
+        for r in records
+    ], ordered=False)
+
+    ops, op_emps, stale = [], [], []
+    for eid, rows in by_emp.items():
+        rollup = rollups.get(eid) or _empty_rollup(eid)
+        needs_rebuild = False
+        for r in sorted(rows, key=lambda r: r["date"]):
+            key = (eid, r["date"])
+            needs_rebuild |= _apply(rollup, r["date"], r.get("status") == "absent", previous.get(key))
+            previous[key] = r.get("status")
+        if needs_rebuild:
+            stale.append(eid)
+            continue
+        rollup.update(_window_counts(rollup))
+        match, rollups[eid] = _versioned(rollup)
+        ops.append(ReplaceOne(match, rollups[eid], upsert=True))
+        op_emps.append(eid)
+    try:
+        if ops:
+            db.attendance_rollups.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        stale.extend(op_emps[err["index"]] for err in errors)
+    for eid in stale:
+        rollups[eid] = _rebuild_employee(eid)
+
+    _sync_employees(rollups.values())
+    return len(records)
+
+
+def _sync_employees(rollups):
+    """
+    Denormalize the rolling absence count onto employees.absence_count
+    (read by the dashboard and triggers) and refresh model features.
+    """
+    field = f"absent_{ABSENCE_COUNT_WINDOW_DAYS}d"
+    rollups = list(rollups)
+    if not rollups:
+        return
+    db.employees.bulk_write([
+        UpdateOne({"employee_id": r["employee_id"]}, {"$set": {"absence_count": r.get(field, 0)}})
+        for r in rollups
+    ], ordered=False)
+    feature_store.upsert_features(db.employees.find(
+        {"employee_id": {"$in": [r["employee_id"] for r in rollups]}},
+        feature_store.SOURCE_PROJECTION))
+    read_models.invalidate_employee(*(r["employee_id"] for r in rollups))
+
+
+def rebuild_rollups(batch_size=1000):
+    """
+    One-off backfill from the attendance collection, walking it in
+    (employee_id, date) index order. Only needed for data loaded before
+    rollups existed; new rows go through record_attendance.
+    """
+    db.attendance_rollups.delete_many({})
+    done = []
+    current = None
+    for r in db.attendance.find({}, {"_id": 0, "employee_id": 1, "date": 1, "status": 1}).sort(
+            [("employee_id", 1), ("date", 1)]):
+        if current is None or current["employee_id"] != r["employee_id"]:
+            if current is not None:
+                current.update(_window_counts(current))
+                done.append(current)
+            current = _empty_rollup(r["employee_id"])
+        _apply(current, r["date"], r.get("status") == "absent")
+        if len(done) >= batch_size:
+            db.attendance_rollups.insert_many(done)
+            _sync_employees(done)
+            done = []
+    if current is not None:
+        current.update(_window_counts(current))
+        done.append(current)
+    if done:
+        db.attendance_rollups.insert_many(done)
+        _sync_employees(done)
@@ -0,0 +1,100 @@
+# batching.py - In-process micro-batching for model inference
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+
+
+def label_and_proba(model, X):
+    """
+    One predict_proba pass over X. Returns (labels, P(class 1)); labels
+    are taken from the arg-max probability, exactly like model.predict.
+    """
+    proba = model.predict_proba(X)
+    classes = np.asarray(model.classes_)
+    labels = classes[np.argmax(proba, axis=1)]
+    classes = list(classes)
+    positive = proba[:, classes.index(1)] if 1 in classes else np.zeros(len(X))
+    return labels, positive
+
+
+class MicroBatcher:
+    """
+    Collects feature rows submitted by concurrent callers for up to
+    `max_wait_ms` (or `max_batch` rows), scores them with a single
+    predict_proba call and hands each caller back its own slice.
+    `get_model` is called per batch, so a swapped model is picked up.
+    """
+
+    def __init__(self, get_model, max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS, name="batcher"):
+        self._get_model = get_model
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.rows = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def submit(self, rows):
+        """Queue feature rows; the Future resolves to a list of (label, probability)."""
+        X = np.asarray(rows, dtype=np.float64).reshape(-1, 4)
+        fut = Future()
+        if len(X) == 0:
+            fut.set_result([])
+            return fut
+        self._ensure_worker()
+        self._queue.put((X, fut))
+        return fut
+
+    def predict(self, rows, timeout=None):
+        return self.submit(rows).result(timeout)
+
+    def _collect(self):
+        items = [self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                X = np.concatenate([x for x, _ in items]) if len(items) > 1 else items[0][0]
+                labels, probs = label_and_proba(self._get_model(), X)
+            except Exception as e:
+                for _, fut in items:
+                    fut.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(X)
+            start = 0
+            for x, fut in items:
+                stop = start + len(x)
+                fut.set_result(list(zip(labels[start:stop].tolist(), probs[start:stop].tolist())))
+                start = stop
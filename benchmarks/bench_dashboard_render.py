@@ -0,0 +1,109 @@
+# bench_dashboard_render.py - Render-time benchmark for templates/hr_dashboard.html
+#
+# Renders the dashboard template with synthetic employees (no MongoDB or
+# models needed) and reports time per render and per row. Run from the
+# repository root:
+#
+#     python benchmarks/bench_dashboard_render.py
+#     python benchmarks/bench_dashboard_render.py --sizes 1000 10000 50000 --legacy
+
+import argparse
+import os
+import random
+import time
+
+from flask import Flask, render_template, render_template_string
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bench_app = Flask(__name__, template_folder=os.path.join(ROOT, "templates"),
+                  static_folder=os.path.join(ROOT, "static"))
+bench_app.secret_key = "bench"
+
+# Endpoints referenced by url_for() in the templates
+for rule, endpoint in [("/", "index"), ("/login/hr", "login_hr"),
+                       ("/login/employee", "login_employee"), ("/logout", "logout"),
+                       ("/hr/dashboard", "hr_dashboard"), ("/employee/<eid>", "employee_view")]:
+    bench_app.add_url_rule(rule, endpoint, lambda **kw: "")
+
+# The pre-change per-row lookup, kept only for comparison
+LEGACY_ROWS = """{% for e in employees %}{% set pred = (preds | selectattr('employee_id','equalto', e.employee_id) | list)[0] %}{{ pred.payroll_risk }}{{ pred.attrition_risk }}{% endfor %}"""
+KEYED_ROWS = """{% for e in employees %}{% set pred = preds_by_id.get(e.employee_id, {}) %}{{ pred.payroll_risk }}{{ pred.attrition_risk }}{% endfor %}"""
+
+
+def make_data(n):
+    rnd = random.Random(42)
+    employees, preds_by_id = [], {}
+    for i in range(n):
+        eid = f"E{100000 + i}"
+        employees.append({
+            "employee_id": eid,
+            "name": f"Employee {i}",
+            "department": rnd.choice(["Sales", "HR", "Dev", "Support", "Finance", "Marketing"]),
+            "salary": rnd.choice([30000, 40000, 50000, 60000]),
+            "tenure_years": rnd.randint(0, 10),
+            "absence_count": rnd.randint(0, 8),
+            "salary_pending": rnd.random() < 0.25,
+        })
+        prob = rnd.random()
+        preds_by_id[eid] = {
+            "employee_id": eid,
+            "name": f"Employee {i}",
+            "payroll_risk": rnd.random() < 0.2,
+            "attrition_risk": prob > 0.5,
+            "attrition_prob": round(prob, 2),
+        }
+    return employees, preds_by_id
+
+
+def make_departments(employees):
+    """Per-department rows shaped like stats.employee_stats()["departments"]."""
+    by_dept = {}
+    for e in employees:
+        by_dept.setdefault(e["department"], []).append(e["salary"])
+    return [{"department": d, "headcount": len(s), "avg_salary": round(sum(s) / len(s), 2),
+             "min_salary": min(s), "max_salary": max(s)} for d, s in sorted(by_dept.items())]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render-time benchmark for the HR dashboard template")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy", action="store_true",
+                        help="also time the old selectattr lookup (quadratic, slow above ~10k)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'full page ms':>14} {'us/row':>8} {'keyed ms':>10}" + (f" {'legacy ms':>10}" if args.legacy else ""))
+    with bench_app.test_request_context("/hr/dashboard"):
+        for n in args.sizes:
+            employees, preds_by_id = make_data(n)
+            context = dict(
+                employees=employees,
+                payroll_chart=[{"employee_id": e["employee_id"], "amount": e["salary"]} for e in employees],
+                total_employees=n, pending_payroll=0, avg_salary=45000,
+                preds_by_id=preds_by_id, payroll_risk_count=0, attrition_risk_count=0,
+                departments=make_departments(employees), triggers=[],
+                scoring={"last_run": {"finished_at": "2025-10-01T00:00:00+00:00", "employees": n, "fired": 0}},
+                department=None, page_size=n, next_after=None,
+            )
+            full = timed(lambda: render_template("hr_dashboard.html", **context), args.repeat)
+            keyed = timed(lambda: render_template_string(KEYED_ROWS, employees=employees, preds_by_id=preds_by_id), args.repeat)
+            line = f"{n:>8} {full * 1000:>14.1f} {full / n * 1e6:>8.2f} {keyed * 1000:>10.1f}"
+            if args.legacy:
+                preds = list(preds_by_id.values())
+                legacy = timed(lambda: render_template_string(LEGACY_ROWS, employees=employees, preds=preds), 1)
+                line += f" {legacy * 1000:>10.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
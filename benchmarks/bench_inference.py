@@ -0,0 +1,90 @@
+# bench_inference.py - sklearn RandomForest vs the compiled form (forest_compiler.py)
+#
+# Fits both models on synthetic features, compiles them, checks that
+# predict_proba agrees exactly and times both at several batch sizes.
+# No MongoDB needed. Run from the repository root:
+#
+#     python benchmarks/bench_inference.py
+#     python benchmarks/bench_inference.py --rows 20000 --sizes 1 32 512 5000
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import forest_compiler               # noqa: E402
+import training                      # noqa: E402
+
+
+def make_features(n, seed=42):
+    """tenure, salary, perf_score, absence columns with roughly realistic ranges."""
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, 4), dtype=np.int32)
+    X[:, 0] = np.minimum(rng.exponential(4.0, size=n).astype(int), 35)
+    X[:, 1] = (rng.lognormal(np.log(42000), 0.25, size=n) / 1000).round() * 1000
+    X[:, 2] = rng.choice(4, size=n, p=[0.1, 0.25, 0.45, 0.2])
+    X[:, 3] = np.minimum(rng.poisson(2.5, size=n), 20)
+    return X, rng.random(n) < 0.06
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Run in a fresh interpreter: does loading + scoring a compiled forest import sklearn?
+SKLEARN_CHECK = ("import sys, numpy as np, forest_compiler as fc; "
+                 "m = fc.CompiledForest.load(sys.argv[1]); m.predict_proba(np.zeros((1, 4))); "
+                 "print(any(k.split('.')[0] == 'sklearn' for k in sys.modules))")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sklearn vs compiled forest inference")
+    parser.add_argument("--rows", type=int, default=20000, help="training rows")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 32, 512, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    X, pending = make_features(args.rows)
+    fitted = {"payroll": training.fit_payroll(X, pending, n_jobs=-1)[0],
+              "attrition": training.fit_attrition(X, n_jobs=-1)[0]}
+    probe, _ = make_features(50_000, seed=7)
+
+    print(f"{'model':>10} {'rows':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for name, model in fitted.items():
+        t0 = time.perf_counter()
+        compiled = forest_compiler.compile_forest(model)
+        compile_s = time.perf_counter() - t0
+        exact = np.array_equal(compiled.predict_proba(probe), model.predict_proba(probe))
+        for n in args.sizes:
+            batch = probe[:n].astype(np.float64)
+            repeat = max(3, args.repeat if n <= 512 else args.repeat // 4)
+            sk = best_of(lambda: model.predict_proba(batch), repeat)
+            co = best_of(lambda: compiled.predict_proba(batch), repeat)
+            print(f"{name:>10} {n:>6} {sk * 1000:>11.3f} {co * 1000:>12.3f} {sk / co:>7.1f}x")
+        print(f"{name:>10} compiled in {compile_s:.2f}s {compiled.summary()}, "
+              f"predict_proba identical on {len(probe):,} rows: {exact}")
+
+        path = os.path.join(ROOT, f".bench_{name}_compiled")
+        try:
+            compiled.save(path)
+            out = subprocess.run([sys.executable, "-c", SKLEARN_CHECK, path], cwd=ROOT,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+            print(f"{name:>10} serving imports sklearn: {out}")
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# bench_login.py - Login throughput under concurrency, inline bcrypt vs the pool
+#
+# Fires POST /login/employee from N client threads through the Flask test
+# client and reports logins/s, latency percentiles and 503 (backpressure)
+# answers. "inline" hashes in the request thread (the old behaviour),
+# "pool" goes through passwords.pool. Needs the MongoDB from config.py
+# (seeded on first run). Run from the repository root:
+#
+#     python benchmarks/bench_login.py --threads 1 8 32 --requests 200
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HRIS_LAZY_STARTUP", "0")
+
+import app as hris                  # noqa: E402
+import passwords                    # noqa: E402
+from config import PASSWORD_POOL_WORKERS, PASSWORD_QUEUE_DEPTH   # noqa: E402
+
+
+def run(threads, total):
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    per_thread = max(1, total // threads)
+
+    def worker(n):
+        client = hris.app.test_client()
+        for i in range(per_thread):
+            k = (n * per_thread + i) % 20 + 1
+            t0 = time.perf_counter()
+            r = client.post("/login/employee", data={"email": f"emp{k}@company.com",
+                                                     "password": f"emppass{k}"})
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                statuses.append(r.status_code)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - start
+
+    ok = sum(1 for s in statuses if s == 302)
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "ok_per_s": ok / wall,
+        "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+        "busy": sum(1 for s in statuses if s == 503),
+        "failed": sum(1 for s in statuses if s not in (302, 503)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput: inline bcrypt vs the password pool")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="logins per run")
+    parser.add_argument("--workers", type=int, default=PASSWORD_POOL_WORKERS)
+    parser.add_argument("--queue-depth", type=int, default=PASSWORD_QUEUE_DEPTH)
+    args = parser.parse_args()
+
+    hris.warmup.wait()
+    modes = {
+        "inline": passwords.PasswordPool(workers=0),
+        "pool": passwords.PasswordPool(workers=args.workers, queue_depth=args.queue_depth),
+    }
+    print(f"{'mode':>7} {'threads':>8} {'logins/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'503s':>6} {'errors':>7}")
+    for name, pool in modes.items():
+        passwords.pool = pool
+        for threads in args.threads:
+            r = run(threads, args.requests)
+            print(f"{name:>7} {threads:>8} {r['ok_per_s']:>10.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} "
+                  f"{r['p99']:>9.1f} {r['busy']:>6} {r['failed']:>7}")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
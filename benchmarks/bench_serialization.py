@@ -0,0 +1,115 @@
+# bench_serialization.py - Allocation and time cost of turning employee documents into JSON
+#
+# Compares the old path (documents fetched with their ObjectId `_id`, then
+# fix_object_ids + clean_mongo_docs copies, then json.dumps) with the
+# current one (`_id` projected away in MongoDB, encoded by serialize.dumps).
+# No MongoDB needed. Run from the repository root:
+#
+#     python benchmarks/bench_serialization.py
+#     python benchmarks/bench_serialization.py --docs 10000 50000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from bson import ObjectId
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import serialize                     # noqa: E402
+
+
+# The pre-change helpers, kept only for comparison
+def fix_object_ids(data):
+    if isinstance(data, list):
+        return [fix_object_ids(i) for i in data]
+    elif isinstance(data, dict):
+        return {k: fix_object_ids(v) for k, v in data.items()}
+    elif isinstance(data, ObjectId):
+        return str(data)
+    return data
+
+
+def clean_mongo_docs(docs):
+    cleaned = []
+    for d in docs:
+        d = dict(d)
+        if "_id" in d:
+            d["_id"] = str(d["_id"])
+        cleaned.append(d)
+    return cleaned
+
+
+def make_docs(n, with_id):
+    rnd = random.Random(42)
+    docs = []
+    for i in range(n):
+        d = {"_id": ObjectId()} if with_id else {}
+        d.update({
+            "employee_id": f"E{100000 + i}",
+            "name": f"Employee {i}",
+            "department": rnd.choice(["Sales", "HR", "Dev", "Support", "Finance", "Marketing"]),
+            "salary": rnd.choice([30000, 40000, 50000, 60000]),
+            "tenure_years": rnd.randint(0, 10),
+            "performance": rnd.choice(["Excellent", "Good", "Average", "Below Average"]),
+            "absence_count": rnd.randint(0, 8),
+            "salary_pending": rnd.random() < 0.25,
+        })
+        docs.append(d)
+    return docs
+
+
+def legacy(docs):
+    return json.dumps(clean_mongo_docs(fix_object_ids(docs))).encode("utf-8")
+
+
+def current(docs):
+    return b"".join(serialize.stream_array(docs))
+
+
+def measure(fn, docs, repeat):
+    """(best seconds, peak bytes allocated while running) for fn(docs)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(docs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ObjectId-free serialization micro-benchmark")
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stdlib", action="store_true", help="encode with json even if orjson is installed")
+    args = parser.parse_args()
+    if args.stdlib:
+        serialize.orjson = None
+
+    encoder = "orjson" if serialize.orjson is not None else "json"
+    print(f"encoder: {encoder}")
+    print(f"{'docs':>8} {'path':>8} {'ms':>9} {'peak KiB':>10} {'B/doc':>8}")
+    for n in args.docs:
+        rows = [("legacy", legacy, make_docs(n, with_id=True)),
+                ("current", current, make_docs(n, with_id=False))]
+        results = {}
+        for name, fn, docs in rows:
+            results[name] = measure(fn, docs, args.repeat)
+            ms, peak = results[name]
+            print(f"{n:>8} {name:>8} {ms * 1000:>9.2f} {peak / 1024:>10.0f} {peak / n:>8.0f}")
+        (lt, lp), (ct, cp) = results["legacy"], results["current"]
+        print(f"{n:>8} {'saved':>8} {(lt - ct) * 1000:>9.2f} {(lp - cp) / 1024:>10.0f} {(lp - cp) / n:>8.0f}"
+              f"   ({lt / ct:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# bench_serving.py - Local load test: sync Flask app vs async Quart app
+#
+# Starts each server in a subprocess on a local port, logs N client threads
+# in as HR and drives a request mix (dashboard, employee view, predict API)
+# for a fixed duration. Reports requests/s, latency percentiles and errors
+# per server and concurrency level. Needs the MongoDB from config.py and,
+# for the async mode, quart/motor/hypercorn. Run from the repository root:
+#
+#     python benchmarks/bench_serving.py --concurrency 4 16 64 --seconds 20
+#     python benchmarks/bench_serving.py --modes async
+
+import argparse
+import http.cookiejar
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    # Werkzeug threaded server (one thread per request)
+    "sync": lambda port: [sys.executable, "-c",
+                          f"import app; app.app.run(port={port}, threaded=True, debug=False)"],
+    # Single event loop under hypercorn
+    "async": lambda port: [sys.executable, "-m", "hypercorn", "async_app:app", "--bind", f"127.0.0.1:{port}"],
+}
+
+PREDICT_BODY = json.dumps({"tenure": 3, "salary": 40000, "perf_score": 1, "absence": 4}).encode("utf-8")
+
+
+def start_server(mode, port):
+    env = dict(os.environ, HRIS_SECRET_KEY="bench", HRIS_LAZY_STARTUP="1")
+    proc = subprocess.Popen(SERVERS[mode](port), cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{mode} server exited with {proc.returncode}")
+        try:
+            if urllib.request.urlopen(base + "/health/ready", timeout=2).status == 200:
+                return proc, base
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.5)
+    proc.kill()
+    raise SystemExit(f"{mode} server not ready")
+
+
+def client(base):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    form = urllib.parse.urlencode({"email": "hr1@company.com", "password": "hrpass1"}).encode()
+    opener.open(base + "/login/hr", form, timeout=30).read()
+    return opener
+
+
+def request_mix(base, i):
+    """The i-th request of a client: mostly views, some API calls."""
+    k = i % 10
+    if k < 2:
+        return urllib.request.Request(base + "/hr/dashboard")
+    if k < 7:
+        return urllib.request.Request(f"{base}/employee/E{101 + i % 20}")
+    return urllib.request.Request(base + "/api/predict", PREDICT_BODY, {"Content-Type": "application/json"})
+
+
+def run(base, concurrency, seconds):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(n):
+        opener = client(base)
+        i = n
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                opener.open(request_mix(base, i), timeout=60).read()
+                ok = True
+            except (urllib.error.URLError, ConnectionError):
+                ok = False
+            dt = time.perf_counter() - t0
+            with lock:
+                if ok:
+                    latencies.append(dt)
+                else:
+                    errors[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {"rps": len(latencies) / wall, "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+            "errors": errors[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async serving load test")
+    parser.add_argument("--modes", nargs="+", choices=sorted(SERVERS), default=["sync", "async"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--port", type=int, default=5077)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for mode in args.modes:
+        proc, base = start_server(mode, args.port)
+        try:
+            for c in args.concurrency:
+                r = run(base, c, args.seconds)
+                print(f"{mode:>6} {c:>8} {r['rps']:>9.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} "
+                      f"{r['p99']:>9.1f} {r['errors']:>7}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# bench_startup.py - Cold boot to first request, eager vs lazy startup
+#
+# Starts a fresh interpreter per run, imports app.py and serves "/" plus
+# "/health/ready" through the Flask test client. Reports the wall time from
+# process spawn to the first "/" response and to readiness. Needs the
+# MongoDB from config.py. Run from the repository root:
+#
+#     python benchmarks/bench_startup.py --runs 3
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import sys, time
+sys.path.insert(0, {root!r})
+import app
+client = app.app.test_client()
+assert client.get("/").status_code == 200
+print("FIRST", flush=True)
+while client.get("/health/ready").status_code != 200:
+    if app.warmup.error is not None:
+        raise SystemExit("warm-up failed")
+    time.sleep(0.01)
+print("READY", flush=True)
+"""
+
+
+def boot_once(lazy):
+    env = dict(os.environ, HRIS_LAZY_STARTUP="1" if lazy else "0")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD.format(root=ROOT)],
+                            cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    marks = {}
+    for line in proc.stdout:
+        line = line.strip()
+        if line in ("FIRST", "READY"):
+            marks[line] = time.perf_counter() - start
+    if proc.wait() != 0:
+        raise RuntimeError("child process failed")
+    return marks["FIRST"], marks["READY"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold boot to first request benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'first request s':>16} {'ready s':>9}")
+    for lazy in (False, True):
+        results = [boot_once(lazy) for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in results)
+        ready = statistics.median(r[1] for r in results)
+        print(f"{'lazy' if lazy else 'eager':>6} {first:>16.2f} {ready:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
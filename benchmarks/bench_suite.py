@@ -0,0 +1,223 @@
+# bench_suite.py - End-to-end benchmarks against a generated large workforce
+#
+# Optionally loads a synthetic workforce (datagen.py), then measures a
+# background scoring pass (scheduler.py), a monthly payroll run
+# (payroll_run.py), the HR dashboard, the HR employee view, both predict APIs (single + bulk),
+# model training and login throughput through the Flask test client.
+# Reports latency percentiles, throughput and process memory per
+# benchmark; --json writes the results for comparing runs.
+#
+# Against a local mongod (point HRIS_MONGO_URI/HRIS_DB_NAME at a scratch DB):
+#
+#     python benchmarks/bench_suite.py --generate 100000 --days 300
+#
+# Fully in-memory (mongomock stand-in; keep sizes small, and concurrency at
+# 1 for exact error counts since mongomock is not thread-safe):
+#
+#     HRIS_MONGO_BACKEND=mongomock python benchmarks/bench_suite.py --generate 2000 --days 60 --concurrency 1
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HRIS_LAZY_STARTUP", "1")      # generate before warm-up seeds anything
+os.environ.setdefault("HRIS_LOG_LEVEL", "WARNING")   # keep per-request logs out of the report
+os.environ.setdefault("HRIS_SCHEDULER", "0")         # scoring passes are timed on their own below
+
+import datagen                       # noqa: E402
+import models                        # noqa: E402
+
+# Keys read by feature_store.api_feature_row
+PAYLOAD = {"tenure": 3, "salary": 42000, "perf_score": 2, "absence": 4}
+
+
+def rss_mb():
+    """Current resident set size (Linux), falling back to the peak."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(name, latencies, wall, errors=0, rss_before=0.0):
+    latencies = sorted(latencies)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    return {
+        "name": name,
+        "n": len(latencies),
+        "errors": errors,
+        "per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(pct(0.50), 2),
+        "p95_ms": round(pct(0.95), 2),
+        "p99_ms": round(pct(0.99), 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+
+
+def drive(name, make_request, n, concurrency, ok=(200, 304)):
+    """Run n requests over `concurrency` threads; make_request(client, i) -> response."""
+    import app as hris
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    counter = iter(range(n))
+    rss_before = rss_mb()
+
+    def worker():
+        client = hris.app.test_client()
+        login(client, "hr")
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            t0 = time.perf_counter()
+            r = make_request(client, i)
+            dt = time.perf_counter() - t0
+            with lock:
+                if r.status_code in ok:
+                    latencies.append(dt)
+                else:
+                    errors[0] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(name, latencies, time.perf_counter() - start, errors[0], rss_before)
+
+
+# Generated accounts (datagen) if present, else the seed_sample_data ones
+ACCOUNTS = {"domain": "bench.local", "hr": lambda k: datagen.DATAGEN_PASSWORD,
+            "employee": lambda k: datagen.DATAGEN_PASSWORD}
+
+
+def use_seeded_accounts():
+    ACCOUNTS.update(domain="company.com", hr=lambda k: f"hrpass{k}", employee=lambda k: f"emppass{k}")
+
+
+def login(client, role, k=1):
+    prefix = "hr" if role == "hr" else "emp"
+    return client.post(f"/login/{role}", data={"email": f"{prefix}{k}@{ACCOUNTS['domain']}",
+                                               "password": ACCOUNTS[role](k)})
+
+
+def bench_training():
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    models.train_models(force=True)
+    wall = time.perf_counter() - t0
+    return summarize("train_models", [wall], wall, 0, rss_before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HRIS benchmark suite")
+    parser.add_argument("--generate", type=int, metavar="N", help="load N synthetic employees first (drops data)")
+    parser.add_argument("--days", type=int, default=300, help="attendance days per generated employee")
+    parser.add_argument("--months", type=int, default=12, help="payroll months per generated employee")
+    parser.add_argument("--logins", type=int, default=200, help="generated employee accounts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per HTTP benchmark")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    if args.generate:
+        rss_before = rss_mb()
+        report = datagen.generate(employees=args.generate, days=args.days, months=args.months,
+                                  logins=args.logins, drop=True,
+                                  progress=lambda m: print(m, file=sys.stderr))
+        print(f"generated {report['counts']} {report['timings']}", file=sys.stderr)
+        results.append(summarize("datagen", [report["timings"]["total_s"]], report["timings"]["total_s"],
+                                 0, rss_before))
+
+    import app as hris
+    t0 = time.perf_counter()
+    hris.warmup.wait()
+    if hris.warmup.error is not None:
+        raise SystemExit(f"warm-up failed: {hris.warmup.error}")
+    results.append(summarize("warm_up", [time.perf_counter() - t0], time.perf_counter() - t0))
+
+    # One full pass so the dashboard has scores and triggers to read
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    hris.scheduler.run_once()
+    results.append(summarize("scoring_pass", [time.perf_counter() - t0], time.perf_counter() - t0, 0, rss_before))
+
+    # A month's payroll run for everyone, then both status transitions
+    latest = (hris.payroll_run.recent_runs(1) or [{"month": "2025-09"}])[0]["month"]
+    year, month = map(int, latest.split("-"))
+    run_month = f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+    for name, step in [("payroll_generate", lambda: hris.payroll_run.generate_run(run_month)),
+                       ("payroll_processed", lambda: hris.payroll_run.advance(run_month, "processed")),
+                       ("payroll_paid", lambda: hris.payroll_run.advance(run_month, "paid"))]:
+        rss_before = rss_mb()
+        t0 = time.perf_counter()
+        step()
+        results.append(summarize(name, [time.perf_counter() - t0], time.perf_counter() - t0, 0, rss_before))
+
+    n_emp = models.db.employees.estimated_document_count()
+    logins = models.db.users.count_documents({"role": "employee", "email": {"$regex": "@bench\\.local$"}})
+    if not logins:
+        use_seeded_accounts()
+        logins = models.db.users.count_documents({"role": "employee", "email": {"$regex": "@company\\.com$"}})
+    logins = max(1, logins)
+    rnd = random.Random(7)
+    emp_ids = [models.generate_id("E", 100 + rnd.randint(1, n_emp)) for _ in range(args.requests)]
+
+    benches = {
+        "hr_dashboard": lambda: drive("hr_dashboard", lambda c, i: c.get("/hr/dashboard"),
+                                      max(1, args.requests // 10), args.concurrency),
+        "employee_view": lambda: drive("employee_view", lambda c, i: c.get(f"/employee/{emp_ids[i]}"),
+                                       args.requests, args.concurrency),
+        "predict": lambda: drive("predict", lambda c, i: c.post("/api/predict", json=PAYLOAD),
+                                 args.requests, args.concurrency),
+        "attrition_predict": lambda: drive("attrition_predict",
+                                           lambda c, i: c.post("/api/attrition_predict", json=PAYLOAD),
+                                           args.requests, args.concurrency),
+        "predict_bulk_1k": lambda: drive("predict_bulk_1k",
+                                         lambda c, i: c.post("/api/predict/bulk", json=[PAYLOAD] * 1000),
+                                         max(1, args.requests // 10), args.concurrency),
+        "attrition_bulk_1k": lambda: drive("attrition_bulk_1k",
+                                           lambda c, i: c.post("/api/attrition_predict/bulk", json=[PAYLOAD] * 1000),
+                                           max(1, args.requests // 10), args.concurrency),
+        "login": lambda: drive("login", lambda c, i: login(c, "employee", i % logins + 1),
+                               max(1, args.requests // 4), args.concurrency, ok=(302,)),
+        "train_models": bench_training,
+    }
+    for name, run in benches.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"… {name}", file=sys.stderr)
+        results.append(run())
+
+    cols = ["name", "n", "errors", "per_s", "p50_ms", "p95_ms", "p99_ms", "max_ms", "rss_mb", "rss_delta_mb"]
+    print(" ".join(f"{c:>18}" if c == "name" else f"{c:>12}" for c in cols))
+    for r in results:
+        print(" ".join(f"{r[c]:>18}" if c == "name" else f"{r[c]:>12}" for c in cols))
+    print(f"peak RSS {peak_rss_mb():.1f} MB, {n_emp:,} employees")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"employees": n_emp, "peak_rss_mb": round(peak_rss_mb(), 1), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
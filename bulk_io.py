@@ -0,0 +1,306 @@
+# bulk_io.py - Streaming CSV/JSONL import and export for employees, payroll and attendance
+#
+#     python bulk_io.py import attendance attendance.csv --rejects rejected.jsonl
+#     python bulk_io.py export payroll payroll.jsonl
+
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import date
+
+from pymongo import UpdateOne
+
+from models import db
+import attendance_rollup
+import feature_store
+import payroll_run
+import read_models
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+
+def _int(v):
+    if isinstance(v, bool):
+        raise ValueError("expected a number")
+    return int(float(v)) if isinstance(v, str) and "." in v else int(v)
+
+def _str(v):
+    v = str(v).strip()
+    if not v:
+        raise ValueError("empty value")
+    return v
+
+def _bool(v):
+    return feature_store.to_bool(v)
+
+def _month(v):
+    v = _str(v)
+    date.fromisoformat(v + "-01")
+    return v
+
+def _day(v):
+    v = _str(v)
+    date.fromisoformat(v)
+    return v
+
+def _choice(*allowed):
+    def check(v):
+        v = _str(v).lower()
+        if v not in allowed:
+            raise ValueError(f"must be one of {', '.join(allowed)}")
+        return v
+    return check
+
+
+# Field -> parser, plus required fields and the upsert key (existing unique index)
+SCHEMAS = {
+    "employees": {
+        "key": ("employee_id",),
+        "required": ("employee_id", "name"),
+        "fields": {
+            "employee_id": _str, "name": _str, "department": _str, "salary": _int,
+            "tenure_years": _int, "performance": _choice("excellent", "good", "average", "below average"),
+            "absence_count": _int, "salary_pending": _bool,
+        },
+        # Set on new documents only, for fields a row leaves out (salary stays unknown)
+        "defaults": {"department": "Unassigned", "tenure_years": 0, "performance": "Average",
+                     "absence_count": 0, "salary_pending": False},
+    },
+    "payroll": {
+        "key": ("employee_id", "month"),
+        "required": ("employee_id", "month", "amount"),
+        "fields": {
+            "payroll_id": _str, "employee_id": _str, "month": _month, "amount": _int,
+            "status": _choice("pending", "processed", "paid"),
+        },
+        # New rows start out pending (payroll_run.py)
+        "defaults": {"status": "pending"},
+    },
+    "attendance": {
+        "key": ("employee_id", "date"),
+        "required": ("employee_id", "date", "status"),
+        "fields": {
+            "attendance_id": _str, "employee_id": _str, "date": _day,
+            "status": _choice("present", "absent"),
+        },
+    },
+}
+
+# Stored performance labels are title-cased ("Below Average")
+PERFORMANCE_LABELS = {k.lower(): k for k in feature_store.PERF_SCORES}
+
+
+def detect_format(name, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if str(name).lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_rows(stream, fmt):
+    """
+    Yield raw row dicts from a text stream of CSV or JSONL. A malformed
+    JSON line is yielded as its ValueError so reading can continue.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+
+def validate(collection, row):
+    """Return a clean document for `row` or raise ValueError."""
+    schema = SCHEMAS[collection]
+    if not isinstance(row, dict):
+        raise ValueError("row is not an object")
+    doc = {}
+    for field, parse in schema["fields"].items():
+        value = row.get(field)
+        if value is None or value == "":
+            if field in schema["required"]:
+                raise ValueError(f"missing {field}")
+            continue
+        try:
+            doc[field] = parse(value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{field}: {e}")
+    if "performance" in doc:
+        doc["performance"] = PERFORMANCE_LABELS[doc["performance"]]
+    return doc
+
+
+def _upsert_update(collection, doc):
+    missing = {k: v for k, v in SCHEMAS[collection].get("defaults", {}).items() if k not in doc}
+    if missing:
+        return {"$set": doc, "$setOnInsert": missing}
+    return {"$set": doc}
+
+
+def _write_chunk(collection, docs):
+    """Unordered bulk upserts on the collection's unique key."""
+    if collection == "attendance":
+        return attendance_rollup.record_attendance(docs)
+
+    key = SCHEMAS[collection]["key"]
+    result = db[collection].bulk_write([
+        UpdateOne({k: d[k] for k in key}, _upsert_update(collection, d), upsert=True) for d in docs
+    ], ordered=False)
+    if collection == "employees":
+        # Rows may carry only some fields; derive features from the merged documents
+        feature_store.upsert_features(db.employees.find(
+            {"employee_id": {"$in": [d["employee_id"] for d in docs]}},
+            feature_store.SOURCE_PROJECTION))
+    read_models.invalidate_employee(*{d["employee_id"] for d in docs})
+    return result.upserted_count + result.matched_count
+
+
+def _known_employees(docs):
+    ids = list({d["employee_id"] for d in docs})
+    return {d["employee_id"] for d in db.employees.find({"employee_id": {"$in": ids}}, {"_id": 0, "employee_id": 1})}
+
+
+def import_stream(collection, stream, fmt="csv", chunk_size=DEFAULT_CHUNK_SIZE, rejects=None, progress=None):
+    """
+    Validate and upsert rows from a text stream, `chunk_size` rows at a
+    time. Rejected rows are written to `rejects` (a text file) as JSONL
+    with their line number and reason. `progress(report)` is called after
+    every chunk. Returns the final report dict.
+    """
+    if collection not in SCHEMAS:
+        raise ValueError(f"unknown collection '{collection}'")
+
+    report = {"collection": collection, "read": 0, "written": 0, "rejected": 0, "errors": []}
+    months = set()   # payroll months touched, recounted into payroll_runs at the end
+
+    def reject(line, row, reason):
+        report["rejected"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "error": reason})
+        if rejects is not None:
+            rejects.write(json.dumps({"line": line, "error": reason, "row": row}, default=str) + "\n")
+
+    def flush(chunk):
+        if not chunk:
+            return
+        if collection != "employees":
+            # Referential integrity: rows must point at an existing employee
+            known = _known_employees([d for _, _, d in chunk])
+            kept = []
+            for line, row, d in chunk:
+                if d["employee_id"] in known:
+                    kept.append(d)
+                else:
+                    reject(line, row, f"unknown employee_id {d['employee_id']}")
+        else:
+            kept = [d for _, _, d in chunk]
+        if kept:
+            report["written"] += _write_chunk(collection, kept)
+            if collection == "payroll":
+                months.update(d["month"] for d in kept)
+        if progress is not None:
+            progress(report)
+
+    chunk = []
+    line = 1 if fmt == "csv" else 0   # CSV line 1 is the header
+    for row in read_rows(stream, fmt):
+        line += 1
+        report["read"] += 1
+        if isinstance(row, Exception):
+            reject(line, None, f"malformed row: {row}")
+            continue
+        try:
+            chunk.append((line, row, validate(collection, row)))
+        except ValueError as e:
+            reject(line, row, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+    if months:
+        payroll_run.refresh_summaries(months)
+    return report
+
+
+def import_file(collection, path, fmt=None, **kwargs):
+    with open(path, newline="", encoding="utf-8") as f:
+        return import_stream(collection, f, detect_format(path, fmt), **kwargs)
+
+
+def export_rows(collection, fmt="csv", query=None, batch_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the collection as CSV or JSONL text chunks straight off a
+    cursor (one chunk per `batch_size` documents).
+    """
+    if collection not in SCHEMAS:
+        raise ValueError(f"unknown collection '{collection}'")
+    fields = list(SCHEMAS[collection]["fields"])
+    cursor = db[collection].find(query or {}, {"_id": 0, **{f: 1 for f in fields}},
+                                 batch_size=batch_size).sort(list((k, 1) for k in SCHEMAS[collection]["key"]))
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fields, extrasaction="ignore") if fmt == "csv" else None
+    if writer is not None:
+        writer.writeheader()
+    n = 0
+    for doc in cursor:
+        if writer is not None:
+            writer.writerow(doc)
+        else:
+            buf.write(json.dumps(doc, default=str) + "\n")
+        n += 1
+        if n % batch_size == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def export_file(collection, path, fmt=None, **kwargs):
+    fmt = detect_format(path, fmt)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        for part in export_rows(collection, fmt, **kwargs):
+            f.write(part)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk CSV/JSONL import/export for HRIS collections")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("collection", choices=sorted(SCHEMAS))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--rejects", help="write rejected rows here (JSONL)")
+    args = parser.parse_args(argv)
+
+    if args.action == "export":
+        export_file(args.collection, args.path, args.format, batch_size=args.chunk_size)
+        print(f"✅ Exported {args.collection} → {args.path}")
+        return 0
+
+    def progress(r):
+        print(f"… read {r['read']}  written {r['written']}  rejected {r['rejected']}", file=sys.stderr)
+
+    rejects = open(args.rejects, "w", encoding="utf-8") if args.rejects else None
+    try:
+        report = import_file(args.collection, args.path, args.format, chunk_size=args.chunk_size,
+                             rejects=rejects, progress=progress)
+    finally:
+        if rejects is not None:
+            rejects.close()
+    print(json.dumps({k: v for k, v in report.items() if k != "errors"}))
+    return 0 if report["rejected"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
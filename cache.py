@@ -0,0 +1,89 @@
+# cache.py - Bounded in-process LRU cache with TTL and hit-rate counters
+
+import threading
+import time
+from collections import OrderedDict
+
+# Sentinel for "not cached" (None is a cacheable value)
+MISSING = object()
+
+# Every cache created, so their stats can be reported together
+_registry = {}
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache: at most `maxsize` entries, each valid for `ttl`
+    seconds. Cached None values are real hits; with cache_none=False a
+    None is never stored, so misses are re-checked every time. Invalidation
+    is explicit (invalidate/clear) or by expiry.
+    """
+
+    def __init__(self, name, maxsize=1024, ttl=60.0, cache_none=True):
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.cache_none = cache_none
+        self._data = OrderedDict()      # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, MISSING)
+            if item is not MISSING and item[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if value is None and not self.cache_none:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Read-through: return the cached value or load, store and return it."""
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def all_stats():
+    """Stats of every cache in this process, keyed by cache name."""
+    return {name: c.stats() for name, c in _registry.items()}
@@ -1,5 +1,116 @@
 # config.py - MongoDB connection
-MONGO_URI = "mongodb://localhost:27017/hris_db"
-DB_NAME = "hris_db"
-MODEL_PATH = "ml_models/payroll_risk_model.joblib"
-ATTRITION_MODEL_PATH = "ml_models/attrition_model.joblib"
+import os
+MONGO_URI = os.environ.get("HRIS_MONGO_URI", "mongodb://localhost:27017/hris_db")
+DB_NAME = os.environ.get("HRIS_DB_NAME", "hris_db")
+# "mongodb" (a real server at MONGO_URI) or "mongomock" (in-process, in-memory
+# stand-in for local benchmarks; needs the mongomock package)
+MONGO_BACKEND = os.environ.get("HRIS_MONGO_BACKEND", "mongodb")
+
+# Connection pool and timeouts for the shared MongoClient (models.py) and
+# the Motor client (async_models.py). Pool size bounds concurrent DB work
+# per process; waitQueueTimeoutMS turns pool exhaustion into a fast error.
+MONGO_CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.environ.get("HRIS_MONGO_MAX_POOL_SIZE", "100")),
+    "minPoolSize": int(os.environ.get("HRIS_MONGO_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.environ.get("HRIS_MONGO_MAX_IDLE_TIME_MS", "300000")),
+    "waitQueueTimeoutMS": int(os.environ.get("HRIS_MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+    "serverSelectionTimeoutMS": int(os.environ.get("HRIS_MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "connectTimeoutMS": int(os.environ.get("HRIS_MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": int(os.environ.get("HRIS_MONGO_SOCKET_TIMEOUT_MS", "30000")),
+}
+# Per-command latency / pool checkout histograms (served at /metrics/db)
+DB_METRICS_ENABLED = os.environ.get("HRIS_DB_METRICS", "1") == "1"
+# Identical triggers (same employee + event type) fire at most once per window
+TRIGGER_COOLDOWN_SECONDS = float(os.environ.get("HRIS_TRIGGER_COOLDOWN_SECONDS", str(24 * 60 * 60)))
+
+# Background scoring + trigger evaluation (scheduler.py). With the in-app
+# scheduler disabled, run `python scheduler.py` as a separate worker
+SCHEDULER_ENABLED = os.environ.get("HRIS_SCHEDULER", "1") == "1"
+SCORING_INTERVAL_SECONDS = float(os.environ.get("HRIS_SCORING_INTERVAL_SECONDS", "300"))
+SCORING_BATCH_SIZE = int(os.environ.get("HRIS_SCORING_BATCH_SIZE", "1000"))
+SCORING_CONCURRENCY = int(os.environ.get("HRIS_SCORING_CONCURRENCY", "2"))
+# A pass holds a MongoDB lease (renewed per batch) so only one process scores at a time
+SCHEDULER_LEASE_SECONDS = float(os.environ.get("HRIS_SCHEDULER_LEASE_SECONDS", "120"))
+
+# Startup: defer seeding + model loading to a background thread so the
+# web process can serve login/static routes immediately
+LAZY_STARTUP = os.environ.get("HRIS_LAZY_STARTUP", "1") == "1"
+# How long ML routes wait for warm-up before answering "warming up"
+WARMUP_WAIT_SECONDS = float(os.environ.get("HRIS_WARMUP_WAIT_SECONDS", "5"))
+# A failed warm-up (e.g. MongoDB not reachable yet) is retried this many
+# times with doubling backoff; after that the next request starts it again
+WARMUP_RETRIES = int(os.environ.get("HRIS_WARMUP_RETRIES", "5"))
+WARMUP_RETRY_BACKOFF_SECONDS = float(os.environ.get("HRIS_WARMUP_RETRY_BACKOFF_SECONDS", "1"))
+WARMUP_RETRY_MAX_SECONDS = float(os.environ.get("HRIS_WARMUP_RETRY_MAX_SECONDS", "30"))
+
+# Micro-batching for /api/predict + /api/attrition_predict: requests that
+# arrive within BATCH_MAX_WAIT_MS share one predict_proba call
+BATCH_MAX_SIZE = int(os.environ.get("HRIS_BATCH_MAX_SIZE", "512"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("HRIS_BATCH_MAX_WAIT_MS", "3"))
+
+# Versioned model registry: ml_models/<name>/vNNNN/ + CURRENT pointer
+MODEL_REGISTRY_DIR = os.environ.get(
+    "HRIS_MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml_models"))
+# Workers stat the CURRENT pointer at most this often to pick up new versions
+MODEL_RELOAD_CHECK_SECONDS = float(os.environ.get("HRIS_MODEL_RELOAD_CHECK_SECONDS", "2"))
+# Older versions beyond this many are pruned on publish
+MODEL_REGISTRY_KEEP = int(os.environ.get("HRIS_MODEL_REGISTRY_KEEP", "5"))
+# Serve the compiled NumPy form of each forest (compiled/, see
+# forest_compiler.py) instead of the sklearn pickle when a version has one
+SERVE_COMPILED_MODELS = os.environ.get("HRIS_COMPILED_MODELS", "1") == "1"
+
+# Training: Mongo cursor batch size when streaming features, and cores
+# used by RandomForest fitting (-1 = all)
+TRAINING_BATCH_SIZE = int(os.environ.get("HRIS_TRAINING_BATCH_SIZE", "10000"))
+TRAINING_N_JOBS = int(os.environ.get("HRIS_TRAINING_N_JOBS", "-1"))
+
+# employees.absence_count is kept equal to absences in this rolling window
+# (maintained incrementally by attendance_rollup; 30 or 90)
+ABSENCE_COUNT_WINDOW_DAYS = 30
+
+# HR employee view: cached read model (per process) and attendance rows per page
+EMPLOYEE_VIEW_CACHE_SIZE = int(os.environ.get("HRIS_EMPLOYEE_VIEW_CACHE_SIZE", "2048"))
+EMPLOYEE_VIEW_CACHE_TTL = float(os.environ.get("HRIS_EMPLOYEE_VIEW_CACHE_TTL", "60"))
+ATTENDANCE_VIEW_LIMIT = 31
+
+# Read-through caches for user (by email) and employee (by employee_id) documents
+USER_CACHE_SIZE = int(os.environ.get("HRIS_USER_CACHE_SIZE", "4096"))
+USER_CACHE_TTL = float(os.environ.get("HRIS_USER_CACHE_TTL", "300"))
+
+# bcrypt runs on a bounded pool; logins beyond workers + queue depth get a 503
+PASSWORD_POOL_WORKERS = int(os.environ.get("HRIS_PASSWORD_POOL_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_QUEUE_DEPTH = int(os.environ.get("HRIS_PASSWORD_QUEUE_DEPTH", "64"))
+PASSWORD_TIMEOUT_SECONDS = float(os.environ.get("HRIS_PASSWORD_TIMEOUT_SECONDS", "10"))
+PASSWORD_HASH_ROUNDS = 12    # Flask-Bcrypt default
+
+# Session signing key shared by the sync (app.py) and async (async_app.py)
+# servers; set it in production so sessions survive restarts
+SECRET_KEY = os.environ.get("HRIS_SECRET_KEY") or os.urandom(24)
+
+# payroll_run.py: employees per bulk upsert when generating a month's payroll
+PAYROLL_RUN_BATCH_SIZE = int(os.environ.get("HRIS_PAYROLL_RUN_BATCH_SIZE", "10000"))
+
+# /api/employees encodes and sends this many documents per chunk
+API_STREAM_CHUNK_SIZE = int(os.environ.get("HRIS_API_STREAM_CHUNK_SIZE", "1000"))
+
+# async_app.py: threads for blocking work (ML scoring, bcrypt waits)
+ASYNC_EXECUTOR_WORKERS = int(os.environ.get("HRIS_ASYNC_EXECUTOR_WORKERS", "8"))
+
+# Structured logs (JSON lines, written by a background thread); stdout if no file
+LOG_LEVEL = os.environ.get("HRIS_LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("HRIS_LOG_FILE") or None
+
+# Request timing: Server-Timing header on every response, plus opt-in
+# cProfile dumps for requests sent with PROFILE_HEADER: <PROFILE_TOKEN>
+# (disabled while the token is empty) or picked at PROFILE_SAMPLE_RATE
+SERVER_TIMING_ENABLED = os.environ.get("HRIS_SERVER_TIMING", "1") == "1"
+PROFILE_HEADER = "X-HRIS-Profile"
+PROFILE_TOKEN = os.environ.get("HRIS_PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("HRIS_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("HRIS_PROFILE_DIR", "profiles")
+
+# /metrics/* need an HR session, or METRICS_HEADER: <METRICS_TOKEN> for
+# scrapers (token access disabled while it is empty)
+METRICS_HEADER = "X-HRIS-Metrics-Token"
+METRICS_TOKEN = os.environ.get("HRIS_METRICS_TOKEN", "")
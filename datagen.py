@@ -0,0 +1,237 @@
+# datagen.py - Synthetic large-workforce generator for load and regression testing
+#
+#     python datagen.py --employees 100000 --months 12 --days 300 --drop
+#
+# Bulk-loads employees, employee logins, monthly payroll and working-day
+# attendance with realistic shapes (department-dependent salaries, tenure,
+# correlated performance and per-person absence rates). Rows are generated
+# with numpy in employee chunks and written with unordered insert_many, so
+# memory stays flat at any size. Indexes, attendance rollups and the
+# feature store are built once after the load, as a cold start would.
+# 100k employees x 300 days is 30M attendance rows.
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from models import db, ensure_indexes, employee_cache, user_cache, generate_id
+import attendance_rollup
+import feature_store
+import passwords
+import payroll_run
+
+# Every generated login (emp<N>@bench.local, hr<N>@bench.local) uses this password
+DATAGEN_PASSWORD = "benchpass"
+
+DEPARTMENTS = ["Sales", "HR", "Dev", "Support", "Finance", "Marketing"]
+DEPARTMENT_WEIGHTS = [0.25, 0.06, 0.30, 0.20, 0.09, 0.10]
+BASE_SALARY = {"Sales": 38000, "HR": 42000, "Dev": 52000, "Support": 32000, "Finance": 48000, "Marketing": 40000}
+PERFORMANCE = ["Excellent", "Good", "Average", "Below Average"]
+
+COLLECTIONS = ["users", "employees", "employee_features", "payroll", "payroll_runs", "attendance",
+               "attendance_rollups", "risk_scores", "triggers"]
+
+
+def months_back(end, n):
+    """The n calendar months ending with end's month, oldest first ("YYYY-MM")."""
+    y, m = end.year, end.month
+    out = []
+    for _ in range(n):
+        out.append(f"{y:04d}-{m:02d}")
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return out[::-1]
+
+
+def working_days(end, n):
+    """The n Monday-Friday dates ending at (or before) end, oldest first."""
+    out = []
+    d = end
+    while len(out) < n:
+        if d.weekday() < 5:
+            out.append(d.isoformat())
+        d -= timedelta(days=1)
+    return out[::-1]
+
+
+def employee_chunk(rng, start, n):
+    """Employees start+1 .. start+n plus their per-day absence probabilities."""
+    dept = rng.choice(len(DEPARTMENTS), size=n, p=DEPARTMENT_WEIGHTS)
+    tenure = np.minimum(rng.exponential(4.0, size=n).astype(int), 35)
+    # Log-normal spread around the department base, +2.5% per tenure year
+    base = np.array([BASE_SALARY[DEPARTMENTS[d]] for d in dept], dtype=float)
+    salary = (base * rng.lognormal(0.0, 0.18, size=n) * (1.025 ** tenure) / 1000).round() * 1000
+    # Most people average/good; a latent "engagement" drives performance and absences
+    engagement = rng.normal(0.0, 1.0, size=n)
+    perf_idx = np.digitize(-engagement + rng.normal(0, 0.5, size=n), [-1.2, 0.2, 1.3])
+    absence_rate = np.clip(rng.beta(1.2, 30.0, size=n) * np.exp(-0.35 * engagement), 0.0, 0.6)
+    pending = rng.random(n) < 0.06
+
+    employees = []
+    for i in range(n):
+        k = start + i + 1
+        employees.append({
+            "employee_id": generate_id("E", 100 + k),
+            "name": f"Employee {k}",
+            "department": DEPARTMENTS[dept[i]],
+            "salary": int(salary[i]),
+            "tenure_years": int(tenure[i]),
+            "performance": PERFORMANCE[perf_idx[i]],
+            "absence_count": 0,                      # set from rollups after the load
+            "salary_pending": bool(pending[i]),
+        })
+    return employees, absence_rate
+
+
+def payroll_rows(rng, employees, months, counter):
+    last = len(months) - 1
+    rows = []
+    for e in employees:
+        # salary is the monthly amount (seeded payroll rows use amount = salary)
+        amounts = (e["salary"] * rng.normal(1.0, 0.03, size=len(months))).round()
+        for j, month in enumerate(months):
+            if j < last:
+                status = "paid"
+            else:
+                status = "pending" if e["salary_pending"] or rng.random() < 0.3 else "processed"
+            counter += 1
+            rows.append({
+                "payroll_id": generate_id("PAY", counter),
+                "employee_id": e["employee_id"],
+                "month": month,
+                "amount": int(amounts[j]),
+                "status": status,
+            })
+    return rows, counter
+
+
+def attendance_rows(rng, employees, absence_rate, days, counter):
+    """Yield attendance documents employee by employee (absences come in short runs)."""
+    for e, rate in zip(employees, absence_rate):
+        absent = rng.random(len(days)) < rate
+        # Extend some absences into the next day (sick spells)
+        absent[1:] |= absent[:-1] & (rng.random(len(days) - 1) < 0.35)
+        for day, a in zip(days, absent):
+            counter += 1
+            yield {
+                "attendance_id": generate_id("ATT", counter),
+                "employee_id": e["employee_id"],
+                "date": day,
+                "status": "absent" if a else "present",
+            }
+
+
+def _insert(collection, docs, batch_size):
+    batch = []
+    n = 0
+    for d in docs:
+        batch.append(d)
+        if len(batch) >= batch_size:
+            db[collection].insert_many(batch, ordered=False)
+            n += len(batch)
+            batch = []
+    if batch:
+        db[collection].insert_many(batch, ordered=False)
+        n += len(batch)
+    return n
+
+
+def generate(employees=100_000, months=12, days=300, hr_users=3, logins=1000, end=None,
+             chunk_size=5000, batch_size=20_000, seed=42, drop=False, progress=print):
+    """
+    Load a synthetic workforce. `logins` employees (and `hr_users` HR
+    accounts) get a user document with DATAGEN_PASSWORD. Refuses to mix
+    with existing data unless drop=True. Returns row counts and timings.
+    """
+    end = end or date.today()
+    if drop:
+        for name in COLLECTIONS:
+            db[name].drop()
+    elif db.employees.estimated_document_count() or db.users.estimated_document_count():
+        raise SystemExit("❌ Database is not empty; pass --drop to replace it")
+
+    rng = np.random.default_rng(seed)
+    month_list = months_back(end, months)
+    day_list = working_days(end, days)
+    counts = {"employees": 0, "users": 0, "payroll": 0, "attendance": 0}
+    timings = {}
+    t0 = time.perf_counter()
+
+    # One bcrypt hash shared by every generated login (salted once)
+    hashed = passwords.pool.hash(DATAGEN_PASSWORD)
+    users = [{"user_id": generate_id("HR", i), "name": f"HR {i}", "email": f"hr{i}@bench.local",
+              "password": hashed, "role": "hr"} for i in range(1, hr_users + 1)]
+    if users:
+        db.users.insert_many(users, ordered=False)
+        counts["users"] += len(users)
+
+    pay_counter = att_counter = 0
+    for start in range(0, employees, chunk_size):
+        n = min(chunk_size, employees - start)
+        emps, absence_rate = employee_chunk(rng, start, n)
+        db.employees.insert_many(emps, ordered=False)
+        counts["employees"] += n
+
+        logins_here = max(0, min(n, logins - start))
+        if logins_here:
+            db.users.insert_many([{
+                "user_id": e["employee_id"], "name": e["name"], "email": f"emp{start + i + 1}@bench.local",
+                "password": hashed, "role": "employee", "employee_id": e["employee_id"],
+            } for i, e in enumerate(emps[:logins_here])], ordered=False)
+            counts["users"] += logins_here
+
+        rows, pay_counter = payroll_rows(rng, emps, month_list, pay_counter)
+        counts["payroll"] += _insert("payroll", rows, batch_size)
+        counts["attendance"] += _insert("attendance", attendance_rows(rng, emps, absence_rate, day_list, att_counter),
+                                        batch_size)
+        att_counter += n * len(day_list)
+        progress(f"… {counts['employees']:,}/{employees:,} employees, {counts['attendance']:,} attendance rows "
+                 f"({time.perf_counter() - t0:.0f}s)")
+    timings["load_s"] = time.perf_counter() - t0
+
+    # Indexes after the bulk load (much cheaper than maintaining them row by row)
+    t = time.perf_counter()
+    ensure_indexes()
+    feature_store.ensure_feature_indexes()
+    attendance_rollup.ensure_rollup_indexes()
+    timings["indexes_s"] = time.perf_counter() - t
+
+    # Rollups set employees.absence_count and derive features as they go
+    t = time.perf_counter()
+    attendance_rollup.rebuild_rollups()
+    feature_store.refresh()
+    payroll_run.refresh_summaries()
+    timings["rollups_features_s"] = time.perf_counter() - t
+
+    user_cache.clear()
+    employee_cache.clear()
+    timings["total_s"] = time.perf_counter() - t0
+    return {"counts": counts, "timings": {k: round(v, 2) for k, v in timings.items()}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic HRIS workforce")
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--months", type=int, default=12, help="payroll months per employee")
+    parser.add_argument("--days", type=int, default=300, help="attendance working days per employee")
+    parser.add_argument("--hr-users", type=int, default=3)
+    parser.add_argument("--logins", type=int, default=1000, help="employees that get a user account")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000, help="employees generated per chunk")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="documents per insert_many")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--drop", action="store_true", help="drop the HRIS collections first")
+    args = parser.parse_args(argv)
+
+    report = generate(employees=args.employees, months=args.months, days=args.days, hr_users=args.hr_users,
+                      logins=args.logins, end=args.end_date, chunk_size=args.chunk_size,
+                      batch_size=args.batch_size, seed=args.seed, drop=args.drop,
+                      progress=lambda m: print(m, file=sys.stderr))
+    print(f"✅ Generated {report['counts']} in {report['timings']['total_s']}s {report['timings']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
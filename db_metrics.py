@@ -0,0 +1,220 @@
+# db_metrics.py - MongoDB command latency and pool checkout-wait histograms
+#
+# Registered on the MongoClient via event_listeners (see models.py). Every
+# command is timed per "<collection>.<command>" and, when issued inside a
+# helper wrapped with @timed, per helper name too. Served at /metrics/db.
+
+import contextvars
+import functools
+import threading
+import time
+
+from pymongo import monitoring
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Name of the models.py helper issuing the current command, if any
+_helper = contextvars.ContextVar("db_helper", default=None)
+
+# Per-request totals (set by profiling.py): {"count": n, "ms": total}
+request_totals = contextvars.ContextVar("db_request_totals", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (ms) with count, sum and max."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, ms, failed=False):
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        if failed:
+            self.errors += 1
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th quantile (capped at max)."""
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(float(BUCKETS_MS[i]), self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_ms": round(self.total, 2),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 3),
+            "buckets": {f"le_{b}": n for b, n in zip(list(BUCKETS_MS) + ["inf"], self.counts)},
+        }
+
+
+class Registry:
+    """Named histograms plus a few counters, safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement window (the in_use gauge carries over)."""
+        with self._lock:
+            in_use = getattr(self, "pool", {}).get("in_use", 0)
+            self.commands = {}
+            self.helpers = {}
+            self.checkout = Histogram()
+            self.pool = {"connections_created": 0, "connections_closed": 0,
+                         "in_use": in_use, "checkout_failures": 0, "pool_cleared": 0}
+
+    def observe(self, table, key, ms, failed=False):
+        with self._lock:
+            hist = table.get(key)
+            if hist is None:
+                hist = table[key] = Histogram()
+            hist.observe(ms, failed)
+
+    def observe_checkout(self, ms, failed=False):
+        with self._lock:
+            self.checkout.observe(ms, failed)
+
+    def count(self, name, delta=1):
+        with self._lock:
+            self.pool[name] += delta
+
+    def snapshot(self):
+        """Commands and helpers sorted by total time spent, largest first."""
+        with self._lock:
+            by_total = lambda t: dict(sorted(((k, h.snapshot()) for k, h in t.items()),
+                                             key=lambda kv: -kv[1]["total_ms"]))
+            return {
+                "commands": by_total(self.commands),
+                "helpers": by_total(self.helpers),
+                "pool": {**self.pool, "checkout_wait": self.checkout.snapshot()},
+            }
+
+
+metrics = Registry()
+
+
+def timed(name):
+    """Attribute the MongoDB commands a helper issues to `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _helper.set(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _helper.reset(token)
+        return wrapper
+    return decorate
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Per-command latency from the driver's own duration measurement."""
+
+    def __init__(self, registry=metrics):
+        self.registry = registry
+        self._inflight = {}          # (request_id, connection_id) -> (command key, helper, request totals)
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        key = f"{collection}.{event.command_name}" if isinstance(collection, str) else event.command_name
+        with self._lock:
+            self._inflight[(event.request_id, event.connection_id)] = (key, _helper.get(), request_totals.get())
+
+    def _finish(self, event, failed):
+        with self._lock:
+            key, helper, totals = self._inflight.pop(
+                (event.request_id, event.connection_id), (event.command_name, None, None))
+        ms = event.duration_micros / 1000.0
+        if totals is not None:
+            totals["count"] += 1
+            totals["ms"] += ms
+        self.registry.observe(self.registry.commands, key, ms, failed)
+        if helper:
+            self.registry.observe(self.registry.helpers, helper, ms, failed)
+
+    def succeeded(self, event):
+        self._finish(event, False)
+
+    def failed(self, event):
+        self._finish(event, True)
+
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """
+    Time from asking the pool for a connection to getting one. Check-out
+    events are published on the requesting thread, so a thread-local
+    start time pairs them up.
+    """
+
+    def __init__(self, registry=metrics):
+        self.registry = registry
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.start = time.perf_counter()
+
+    def _waited(self, failed):
+        start = getattr(self._local, "start", None)
+        if start is not None:
+            self._local.start = None
+            self.registry.observe_checkout((time.perf_counter() - start) * 1000.0, failed)
+
+    def connection_checked_out(self, event):
+        self._waited(False)
+        self.registry.count("in_use")
+
+    def connection_check_out_failed(self, event):
+        self._waited(True)
+        self.registry.count("checkout_failures")
+
+    def connection_checked_in(self, event):
+        self.registry.count("in_use", -1)
+
+    def connection_created(self, event):
+        self.registry.count("connections_created")
+
+    def connection_closed(self, event):
+        self.registry.count("connections_closed")
+
+    def pool_cleared(self, event):
+        self.registry.count("pool_cleared")
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+def listeners():
+    """Listeners to pass as MongoClient(event_listeners=...)."""
+    return [CommandTimer(), PoolTimer()]
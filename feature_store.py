@@ -0,0 +1,178 @@
+# feature_store.py - Single source of model features for training and inference
+
+import hashlib
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import UpdateOne
+
+from config import TRAINING_BATCH_SIZE
+from models import db
+
+# Performance label -> ordinal score used as a model feature
+PERF_SCORES = {"Excellent": 3, "Good": 2, "Average": 1, "Below Average": 0}
+
+# Column order of the feature matrix (must match training)
+FEATURE_COLUMNS = ["tenure", "salary", "perf_score", "absence"]
+
+# Employee fields the features are derived from
+SOURCE_PROJECTION = {
+    "_id": 0, "employee_id": 1, "tenure_years": 1, "salary": 1,
+    "performance": 1, "absence_count": 1, "salary_pending": 1,
+}
+
+STORE_PROJECTION = {"_id": 0, "employee_id": 1, "salary_pending": 1, "feature_hash": 1,
+                    **{c: 1 for c in FEATURE_COLUMNS}}
+
+
+# salary_pending strings (case-insensitive, trimmed) that mean True; numbers mean True when == 1
+TRUTHY_STRINGS = ("true", "1", "pending", "yes")
+
+
+def to_bool(value):
+    """Normalize salary_pending values from DB to True/False."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value == 1
+    return isinstance(value, str) and value.strip().lower() in TRUTHY_STRINGS
+
+
+# -----------------------------
+# DERIVATION (the only place features are computed)
+# -----------------------------
+def derive_features(e):
+    """(tenure, salary, perf_score, absence) from an employee document."""
+    return (
+        int(e.get("tenure_years", 0)),
+        int(e.get("salary", 30000)),
+        PERF_SCORES.get(e.get("performance", "Average"), 1),
+        int(e.get("absence_count", 0)),
+    )
+
+
+def api_feature_row(data):
+    """Feature row from an API payload, which carries perf_score directly."""
+    return [
+        int(data.get("tenure", 0)),
+        int(data.get("salary", 30000)),
+        int(data.get("perf_score", 1)),
+        int(data.get("absence", 0)),
+    ]
+
+
+def feature_hash(row):
+    """Stable hash of one feature row."""
+    key = ",".join(str(int(v)) for v in row)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# WRITE PATH
+# -----------------------------
+def ensure_feature_indexes():
+    db.employee_features.create_index("employee_id", unique=True)
+
+
+def upsert_features(employees):
+    """
+    Derive features for employee documents and write only the rows whose
+    features changed. Call this from every code path that writes
+    employees. Returns the number of rows written.
+    """
+    derived = {}
+    for e in employees:
+        row = derive_features(e)
+        derived[e["employee_id"]] = (row, feature_hash(row), to_bool(e.get("salary_pending", False)))
+    if not derived:
+        return 0
+
+    stored = {
+        d["employee_id"]: (d.get("feature_hash"), d.get("salary_pending"))
+        for d in db.employee_features.find(
+            {"employee_id": {"$in": list(derived)}},
+            {"_id": 0, "employee_id": 1, "feature_hash": 1, "salary_pending": 1}
+        )
+    }
+
+    now = datetime.now(timezone.utc).isoformat()
+    ops = []
+    for eid, (row, h, pending) in derived.items():
+        if stored.get(eid) == (h, pending):
+            continue
+        ops.append(UpdateOne(
+            {"employee_id": eid},
+            {"$set": {**dict(zip(FEATURE_COLUMNS, row)),
+                      "salary_pending": pending, "feature_hash": h, "updated_at": now}},
+            upsert=True,
+        ))
+    if ops:
+        db.employee_features.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def refresh(batch_size=TRAINING_BATCH_SIZE):
+    """
+    Reconcile the store with the employees collection (for writes that
+    bypassed upsert_features). Streams only the source fields.
+    Returns the number of rows that changed.
+    """
+    changed = 0
+    batch = []
+    for e in db.employees.find({}, SOURCE_PROJECTION, batch_size=batch_size):
+        batch.append(e)
+        if len(batch) >= batch_size:
+            changed += upsert_features(batch)
+            batch = []
+    if batch:
+        changed += upsert_features(batch)
+    return changed
+
+
+# -----------------------------
+# READ PATH (columnar)
+# -----------------------------
+class FeatureColumns:
+    """Array-backed view of the store: one entry per employee."""
+
+    def __init__(self, employee_ids, X, salary_pending, hashes):
+        self.employee_ids = employee_ids        # object array of str
+        self.X = X                              # int32 (n, 4)
+        self.salary_pending = salary_pending    # bool (n,)
+        self.hashes = hashes                    # object array of str
+
+    def __len__(self):
+        return len(self.X)
+
+
+def load_columns(employee_ids=None, batch_size=TRAINING_BATCH_SIZE):
+    """
+    Read stored features into preallocated columns: the whole store, or
+    only `employee_ids` (returned in store order).
+    """
+    if employee_ids is None:
+        query = {}
+        n = db.employee_features.count_documents({})
+    else:
+        employee_ids = list(employee_ids)
+        query = {"employee_id": {"$in": employee_ids}}
+        n = len(employee_ids)
+
+    ids = np.empty(n, dtype=object)
+    X = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.int32)
+    pending = np.empty(n, dtype=np.bool_)
+    hashes = np.empty(n, dtype=object)
+
+    i = 0
+    for d in db.employee_features.find(query, STORE_PROJECTION, batch_size=batch_size):
+        if i == n:
+            # Store grew while streaming
+            n = max(1, n * 2)
+            ids, hashes = np.resize(ids, n), np.resize(hashes, n)
+            X, pending = np.resize(X, (n, X.shape[1])), np.resize(pending, n)
+        ids[i] = d["employee_id"]
+        X[i] = [d[c] for c in FEATURE_COLUMNS]
+        pending[i] = d["salary_pending"]
+        hashes[i] = d["feature_hash"]
+        i += 1
+    return FeatureColumns(ids[:i], X[:i], pending[:i], hashes[:i])
@@ -0,0 +1,218 @@
+# forest_compiler.py - Compile fitted RandomForests into NumPy lookup tables
+#
+# Each feature's split thresholds (across all trees) cut its axis into
+# bins. For every bin a table row holds, per tree, a 64-bit mask of the
+# leaves still reachable once every split "x > threshold" below that bin
+# has sent the row right (the QuickScorer layout). A row's leaf in each
+# tree is the lowest bit left after AND-ing one table row per feature, so
+# scoring is a searchsorted per feature plus a few array operations for
+# all trees at once. Trees may have up to 64 leaves (max_depth <= 6).
+#
+# predict_proba is bit-for-bit the forest's own (checked at compile time),
+# without sklearn's per-tree dispatch, and loading needs only NumPy. Each
+# table is saved as its own .npy and memory-mapped on load, so every
+# worker process serving a version shares one copy through the page cache.
+#
+#     python forest_compiler.py      # compile current registry versions that lack one
+
+import json
+import os
+import sys
+
+import numpy as np
+
+MAX_LEAVES = 64
+
+# Rows of random probe points (on both sides of every split) used to verify
+VERIFY_ROWS = 20_000
+
+
+class CompiledForest:
+    """
+    Table-backed stand-in for a fitted RandomForestClassifier: supports
+    predict_proba, predict and classes_, which is all the serving code uses.
+
+    thresholds[offsets[f]:offsets[f+1]] are feature f's sorted split
+    thresholds, masks[offsets[f] + f + k] the leaf masks for a value above
+    exactly k of them, and leaf_value[tree * 64 + bit] the class
+    probabilities of each leaf.
+    """
+
+    FIELDS = ("thresholds", "offsets", "masks", "leaf_value", "classes")
+
+    def __init__(self, thresholds, offsets, masks, leaf_value, classes, n_trees, version=None):
+        self.thresholds = thresholds
+        self.offsets = offsets
+        self.masks = masks
+        self.leaf_value = leaf_value
+        self.classes_ = classes
+        self.n_trees = int(n_trees)
+        self.n_features_in_ = len(offsets) - 1
+        self.version = version
+        self._tree_base = np.arange(self.n_trees, dtype=np.intp) * MAX_LEAVES
+
+    @classmethod
+    def from_model(cls, model, version=None):
+        return compile_forest(model, version)
+
+    def leaves(self, X):
+        """(n_rows, n_trees) leaf slot (tree * 64 + bit) each row reaches in each tree."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        mask = None
+        for f in range(self.n_features_in_):
+            lo, hi = self.offsets[f], self.offsets[f + 1]
+            rows = self.masks[np.searchsorted(self.thresholds[lo:hi], X[:, f], side="left") + (lo + f)]
+            mask = rows if mask is None else np.bitwise_and(mask, rows, out=mask)
+        lowest = mask & (~mask + np.uint64(1))
+        return np.frexp(lowest.astype(np.float64))[1] - 1 + self._tree_base
+
+    def predict_proba(self, X):
+        leaves = self.leaves(X)
+        # Sum trees in order, then divide, exactly as RandomForestClassifier does
+        return np.stack([np.cumsum(self.leaf_value[:, k][leaves], axis=1)[:, -1]
+                         for k in range(self.leaf_value.shape[1])], axis=1) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def summary(self):
+        return {"trees": self.n_trees, "splits": len(self.thresholds), "table_kb": self.masks.nbytes // 1024}
+
+    # ---- persistence ----
+    HEADER_FILE = "forest.json"
+
+    def save(self, directory):
+        """
+        Write one .npy per table plus forest.json into `directory`, each
+        swapped in atomically (temp file + rename); the header goes last.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in self.FIELDS:
+            tmp = os.path.join(directory, f".{name}.{os.getpid()}.npy")
+            np.save(tmp, getattr(self, name if name != "classes" else "classes_"), allow_pickle=False)
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+        tmp = os.path.join(directory, f".{self.HEADER_FILE}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"n_trees": self.n_trees, "version": self.version}, f)
+        os.replace(tmp, os.path.join(directory, self.HEADER_FILE))
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-map a saved forest (read-only, shared between processes)."""
+        with open(os.path.join(directory, cls.HEADER_FILE), encoding="utf-8") as f:
+            header = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+                  for name in cls.FIELDS}
+        return cls(**arrays, n_trees=header["n_trees"], version=header["version"])
+
+
+def _normalizes_counts():
+    """sklearn < 1.4 stores class counts in tree_.value and normalises per call."""
+    from sklearn import __version__
+    return tuple(int(p) for p in __version__.split(".")[:2]) < (1, 4)
+
+
+def _walk(tree):
+    """
+    Leaves of one tree left to right, plus (feature, threshold, keep-mask)
+    for every split; keep-mask clears the bits of its left subtree's leaves.
+    """
+    leaves, splits = [], []
+
+    def visit(node):
+        left = tree.children_left[node]
+        if left < 0:
+            leaves.append(node)
+            return
+        first = len(leaves)
+        visit(left)
+        cleared = ((1 << (len(leaves) - first)) - 1) << first
+        splits.append((int(tree.feature[node]), float(tree.threshold[node]), ~cleared & (2**64 - 1)))
+        visit(tree.children_right[node])
+
+    visit(0)
+    return leaves, splits
+
+
+def compile_forest(model, version=None, verify=True):
+    """
+    Compile a fitted single-output RandomForestClassifier. Raises
+    ValueError if a tree has more than 64 leaves or, with verify=True,
+    unless predict_proba matches the forest exactly.
+    """
+    normalize = _normalizes_counts()
+    n_trees = len(model.estimators_)
+    leaf_value = np.zeros((n_trees * MAX_LEAVES, len(model.classes_)), dtype=np.float64)
+    splits = [[] for _ in range(model.n_features_in_)]     # per feature: (threshold, tree, keep)
+
+    for t, est in enumerate(model.estimators_):
+        tree = est.tree_
+        leaves, tree_splits = _walk(tree)
+        if len(leaves) > MAX_LEAVES:
+            raise ValueError(f"tree {t} has {len(leaves)} leaves (max {MAX_LEAVES})")
+        proba = tree.value[leaves, 0, :].astype(np.float64)
+        if normalize:
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer
+        leaf_value[t * MAX_LEAVES:t * MAX_LEAVES + len(leaves)] = proba
+        for feature, threshold, keep in tree_splits:
+            splits[feature].append((threshold, t, keep))
+
+    thresholds, offsets, masks = [], [0], []
+    for feature_splits in splits:
+        feature_splits.sort(key=lambda s: s[0])
+        current = np.full(n_trees, np.iinfo(np.uint64).max, dtype=np.uint64)
+        masks.append(current.copy())
+        for threshold, t, keep in feature_splits:
+            current[t] &= np.uint64(keep)
+            masks.append(current.copy())
+            thresholds.append(threshold)
+        offsets.append(len(thresholds))
+
+    compiled = CompiledForest(
+        thresholds=np.asarray(thresholds, dtype=np.float64),
+        offsets=np.asarray(offsets, dtype=np.intp),
+        masks=np.stack(masks),
+        leaf_value=leaf_value,
+        classes=np.asarray(model.classes_),
+        n_trees=n_trees,
+        version=version,
+    )
+    if verify:
+        X = probe_points(compiled)
+        if not np.array_equal(compiled.predict_proba(X), model.predict_proba(X)):
+            raise ValueError("compiled forest does not reproduce predict_proba")
+    return compiled
+
+
+def probe_points(compiled, rows=VERIFY_ROWS, seed=0):
+    """
+    Random rows built from values on both sides of every split threshold
+    (plus the thresholds themselves), so every branch gets exercised.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.zeros((rows, compiled.n_features_in_), dtype=np.float64)
+    for f in range(compiled.n_features_in_):
+        t = compiled.thresholds[compiled.offsets[f]:compiled.offsets[f + 1]]
+        candidates = np.unique(np.concatenate([np.floor(t), np.ceil(t), t.astype(np.float32), [0.0]]))
+        candidates = np.concatenate([candidates, [candidates.min() - 1, candidates.max() + 1]])
+        X[:, f] = rng.choice(candidates, size=rows)
+    return X
+
+
+def main(argv=None):
+    from models import payroll_registry, attrition_registry
+    for registry in (payroll_registry, attrition_registry):
+        version = registry.current_version()
+        if version is None:
+            print(f"⚠️ {registry.name}: nothing published")
+            continue
+        summary = registry.compile_version(version)
+        print(f"✅ {registry.name} {version}: {summary}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# logs.py - Structured (JSON lines) logging through a background queue
+#
+# Loggers under "hris" hand records to a QueueHandler, so a request thread
+# never blocks on stream or file I/O; a QueueListener thread formats and
+# writes them. Extra structured fields go in extra={"fields": {...}}.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+from config import LOG_LEVEL, LOG_FILE
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup():
+    """Attach the queue to the "hris" logger once per process."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        target = logging.FileHandler(LOG_FILE, encoding="utf-8") if LOG_FILE else logging.StreamHandler(sys.stdout)
+        target.setFormatter(JsonFormatter())
+
+        q = queue.SimpleQueue()
+        root = logging.getLogger("hris")
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(logging.handlers.QueueHandler(q))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(q, target, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)     # drain the queue on shutdown
+
+
+def get_logger(name):
+    setup()
+    return logging.getLogger(f"hris.{name}")
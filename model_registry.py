@@ -0,0 +1,236 @@
+# model_registry.py - Versioned model artifacts with hot-swap reload
+
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import joblib
+
+from config import MODEL_REGISTRY_DIR, MODEL_RELOAD_CHECK_SECONDS, MODEL_REGISTRY_KEEP, SERVE_COMPILED_MODELS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ---------------- Shared Artifacts ----------------
+@contextmanager
+def model_file_lock(path):
+    """Exclusive inter-process lock on `<path>.lock`."""
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            try:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        os.close(fd)
+
+def load_shared_model(path):
+    """Load with mmap_mode so array data is shared through the page cache."""
+    return joblib.load(path, mmap_mode="r")
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# ---------------- Registry ----------------
+class ModelRegistry:
+    """
+    Stores versioned artifacts for one model under `<root>/<name>/vNNNN/`
+    (model.joblib + meta.json) and a CURRENT file naming the live version.
+
+    get() is the per-request entry point: at most every `check_interval`
+    seconds it stats CURRENT, and when a new version was published (by
+    any process) it loads it and swaps the reference. Callers that already
+    hold the previous model keep using it until they finish.
+
+    With a `compiler` (a class with from_model(model, version), load(path)
+    and save/summary on instances) each version also gets a compiled/
+    directory, which get() serves instead of the pickle when
+    `serve_compiled` is set.
+    """
+
+    MODEL_FILE = "model.joblib"
+    META_FILE = "meta.json"
+    COMPILED_DIR = "compiled"
+
+    def __init__(self, name, root=MODEL_REGISTRY_DIR, check_interval=MODEL_RELOAD_CHECK_SECONDS,
+                 keep=MODEL_REGISTRY_KEEP, compiler=None, serve_compiled=SERVE_COMPILED_MODELS):
+        self.name = name
+        self.path = os.path.join(root, name)
+        self.check_interval = check_interval
+        self.keep = max(1, keep)
+        self.compiler = compiler
+        self.serve_compiled = serve_compiled
+        self._lock = threading.Lock()
+        self._loaded = (None, None)          # (version, model)
+        self._pointer_mtime = None
+        self._next_check = 0.0
+
+    # ---- paths ----
+    @property
+    def _pointer(self):
+        return os.path.join(self.path, "CURRENT")
+
+    def _version_dir(self, version):
+        return os.path.join(self.path, version)
+
+    def versions(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(d for d in os.listdir(self.path)
+                      if d.startswith("v") and d[1:].isdigit())
+
+    def current_version(self):
+        try:
+            with open(self._pointer, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def metadata(self, version=None):
+        version = version or self.current_version()
+        if version is None:
+            return None
+        with open(os.path.join(self._version_dir(version), self.META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def version(self):
+        """Version of the model currently held by this process."""
+        return self._loaded[0]
+
+    # ---- publish ----
+    def publish(self, model, metadata=None):
+        """Write a new version and atomically make it current."""
+        os.makedirs(self.path, exist_ok=True)
+        with model_file_lock(os.path.join(self.path, "publish")):
+            existing = self.versions()
+            version = f"v{(int(existing[-1][1:]) + 1 if existing else 1):04d}"
+            meta = {
+                "name": self.name,
+                "version": version,
+                "trained_at": datetime.now(timezone.utc).isoformat(),
+                **(metadata or {}),
+            }
+
+            # Build in a temp dir and rename, so a version dir is always complete
+            tmp_dir = self._version_dir(f".{version}.{os.getpid()}.tmp")
+            os.makedirs(tmp_dir)
+            try:
+                joblib.dump(model, os.path.join(tmp_dir, self.MODEL_FILE))
+                served = model
+                if self.compiler is not None:
+                    compiled = self._compile(model, version, tmp_dir)
+                    meta["compiled"] = compiled.summary() if compiled is not None else None
+                    if compiled is not None and self.serve_compiled:
+                        served = compiled
+                with open(os.path.join(tmp_dir, self.META_FILE), "w", encoding="utf-8") as f:
+                    json.dump(meta, f, indent=2)
+                os.replace(tmp_dir, self._version_dir(version))
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+            _write_atomic(self._pointer, version)
+            self._prune()
+
+        with self._lock:
+            self._loaded = (version, served)
+            self._next_check = 0.0
+        return version
+
+    # ---- compiled form ----
+    def _compile(self, model, version, directory):
+        """Compile + save next to the pickle; None (pickle only) if it can't be compiled exactly."""
+        try:
+            compiled = self.compiler.from_model(model, version)
+            compiled.save(os.path.join(directory, self.COMPILED_DIR))
+            return compiled
+        except Exception as e:
+            print(f"⚠️ {self.name} {version}: serving the pickle, compile failed:", e)
+            return None
+
+    def compile_version(self, version=None):
+        """
+        Add compiled/ to an already published version (e.g. one from
+        before compilation existed). Returns its summary, or None.
+        """
+        version = version or self.current_version()
+        directory = self._version_dir(version)
+        with model_file_lock(os.path.join(self.path, "publish")):
+            model = load_shared_model(os.path.join(directory, self.MODEL_FILE))
+            compiled = self._compile(model, version, directory)
+            meta = self.metadata(version)
+            meta["compiled"] = compiled.summary() if compiled is not None else None
+            _write_atomic(os.path.join(directory, self.META_FILE), json.dumps(meta, indent=2))
+        with self._lock:
+            if compiled is not None and self.serve_compiled and self._loaded[0] == version:
+                self._loaded = (version, compiled)
+        return meta["compiled"]
+
+    def _load(self, version):
+        directory = self._version_dir(version)
+        compiled = os.path.join(directory, self.COMPILED_DIR)
+        if self.compiler is not None and self.serve_compiled and os.path.isdir(compiled):
+            try:
+                return self.compiler.load(compiled)
+            except Exception as e:
+                print(f"⚠️ {self.name} {version}: serving the pickle, compiled form unreadable:", e)
+        return load_shared_model(os.path.join(directory, self.MODEL_FILE))
+
+    def _prune(self):
+        for old in self.versions()[:-self.keep]:
+            shutil.rmtree(self._version_dir(old), ignore_errors=True)
+
+    # ---- load / hot swap ----
+    def get(self):
+        """Current model; reloads when a newer version has been published."""
+        now = time.monotonic()
+        version, model = self._loaded
+        if model is not None and now < self._next_check:
+            return model
+
+        with self._lock:
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self._pointer).st_mtime_ns
+            except OSError:
+                mtime = None
+            if model is not None and mtime == self._pointer_mtime:
+                return model
+
+            current = self.current_version()
+            if current is None:
+                if model is None:
+                    raise LookupError(f"no published version of model '{self.name}'")
+                return model
+            if current != version:
+                model = self._load(current)
+                self._loaded = (current, model)
+                print(f"🔄 Loaded {self.name} model {current}")
+            self._pointer_mtime = mtime
+            return model
@@ -1,48 +1,64 @@
 from pymongo import MongoClient
-from flask_bcrypt import Bcrypt
-from config import MONGO_URI, DB_NAME
+from config import (
+    MONGO_URI, DB_NAME, MONGO_BACKEND, MONGO_CLIENT_OPTIONS, DB_METRICS_ENABLED, USER_CACHE_SIZE, USER_CACHE_TTL
+)
 from bson import ObjectId
-import os, joblib, random
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+import os, random
+from model_registry import ModelRegistry, model_file_lock
+from forest_compiler import CompiledForest
+from cache import TTLCache
+import passwords
+import db_metrics
+from db_metrics import timed
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), "ml_models", "payroll_risk_model.joblib")
-ATTRITION_MODEL_PATH = os.path.join(os.path.dirname(__file__), "ml_models", "attrition_model.joblib")
+# Versioned artifacts (ml_models/<name>/vNNNN/) with hot-swap reload; each
+# version is also compiled to NumPy arrays, which is what gets served
+payroll_registry = ModelRegistry("payroll_risk", compiler=CompiledForest)
+attrition_registry = ModelRegistry("attrition", compiler=CompiledForest)
 
 
 try:
-    client = MongoClient(MONGO_URI)
+    # One pooled client per process, shared by every module via models.db
+    if MONGO_BACKEND == "mongomock":
+        import mongomock            # in-memory stand-in for benchmarks/demos
+        client = mongomock.MongoClient(MONGO_URI)
+    else:
+        client = MongoClient(
+            MONGO_URI,
+            event_listeners=db_metrics.listeners() if DB_METRICS_ENABLED else [],
+            **MONGO_CLIENT_OPTIONS
+        )
     db = client[DB_NAME]
 except Exception as e:
     print("❌ MongoDB connection failed:", e)
     raise
 
-bcrypt = Bcrypt()
-
-# Utility — convert ObjectId → str (for JSON serialization)
-def fix_object_ids(data):
-    if isinstance(data, list):
-        return [fix_object_ids(i) for i in data]
-    elif isinstance(data, dict):
-        return {k: fix_object_ids(v) for k, v in data.items()}
-    elif isinstance(data, ObjectId):
-        return str(data)
-    return data
+# Users by email and employees by employee_id. Misses are not cached: the
+# document may be created by another process, whose invalidation can't reach here
+user_cache = TTLCache("users", USER_CACHE_SIZE, USER_CACHE_TTL, cache_none=False)
+employee_cache = TTLCache("employees", USER_CACHE_SIZE, USER_CACHE_TTL, cache_none=False)
 
 # ---------------- Helper Function ----------------
 def generate_id(prefix, counter):
     """Generate formatted unique ID like EMP001, HR001, PAY001"""
     return f"{prefix}{counter:03d}"
 
-# SEED SAMPLE DATA
-def seed_sample_data():
-    # ======================================
-    # UNIQUE INDEXES (Primary Key Constraints)
-    # ======================================
+# ======================================
+# UNIQUE INDEXES (Primary Key Constraints)
+# ======================================
+def ensure_indexes():
     db.users.create_index("email", unique=True)
     db.employees.create_index("employee_id", unique=True)
+    db.employees.create_index([("department", 1), ("employee_id", 1)])
     db.payroll.create_index([("employee_id", 1), ("month", 1)], unique=True)
+    db.payroll.create_index([("month", 1), ("status", 1)])
+    db.payroll_runs.create_index("month", unique=True)
     db.attendance.create_index([("employee_id", 1), ("date", 1)], unique=True)
+    db.risk_scores.create_index("employee_id", unique=True)
+
+# SEED SAMPLE DATA
+def seed_sample_data():
+    ensure_indexes()
 
     # ======================================
     # USERS (HR + Employees)
@@ -56,7 +72,7 @@ def seed_sample_data():
                 "user_id": hr_id,
                 "name": f"HR {i}",
                 "email": f"hr{i}@company.com",
-                "password": bcrypt.generate_password_hash(f"hrpass{i}").decode("utf-8"),
+                "password": f"hrpass{i}",
                 "role": "hr"
             })
 
@@ -67,11 +83,11 @@ def seed_sample_data():
                 "user_id": eid,
                 "name": f"Employee {i}",
                 "email": f"emp{i}@company.com",
-                "password": bcrypt.generate_password_hash(f"emppass{i}").decode("utf-8"),
+                "password": f"emppass{i}",
                 "role": "employee",
                 "employee_id": eid
             })
-        db.users.insert_many(users)
+        insert_users(users)
 
     # ======================================
     # EMPLOYEES
@@ -98,6 +114,12 @@ def seed_sample_data():
                 "salary_pending": pending
             })
         db.employees.insert_many(employees)
+        employee_cache.clear()
+
+        # Derive model features once for the new documents
+        import feature_store
+        feature_store.ensure_feature_indexes()
+        feature_store.upsert_features(employees)
 
     # ======================================
     # PAYROLL
@@ -134,121 +156,174 @@ def seed_sample_data():
                     "date": f"2025-09-{d:02d}",
                     "status": status
                 })
-        db.attendance.insert_many(attendance)
+        # Goes through the rollup so absence counters stay in sync
+        import attendance_rollup
+        attendance_rollup.ensure_rollup_indexes()
+        attendance_rollup.record_attendance(attendance)
 
 #DB ACCESS HELPERS
+@timed("find_user_by_email")
 def find_user_by_email(email):
-    return db.users.find_one({"email": email})
+    return user_cache.get_or_load(email, lambda: db.users.find_one({"email": email}, {"_id": 0}))
 
+@timed("insert_user")
 def insert_user(user_doc):
-    return db.users.insert_one(user_doc)
-
+    result = db.users.insert_one(user_doc)
+    user_cache.invalidate(user_doc.get("email"))
+    return result
+
+@timed("insert_users")
+def insert_users(user_docs):
+    """Bulk user creation: plain-text "password" fields are hashed in parallel."""
+    user_docs = list(user_docs)
+    hashes = passwords.pool.hash_many(u["password"] for u in user_docs)
+    for u, hashed in zip(user_docs, hashes):
+        u["password"] = hashed
+    result = db.users.insert_many(user_docs)
+    user_cache.invalidate(*(u.get("email") for u in user_docs))
+    return result
+
+@timed("get_employee_by_id")
 def get_employee_by_id(eid):
-    emp = db.employees.find_one({"employee_id": eid})
-    return fix_object_ids(emp)
+    return employee_cache.get_or_load(
+        eid, lambda: db.employees.find_one({"employee_id": eid}, {"_id": 0}))
 
+def invalidate_employees(*employee_ids):
+    """Call after writing employee documents."""
+    employee_cache.invalidate(*employee_ids)
+
+@timed("list_employees")
 def list_employees():
-    return fix_object_ids(list(db.employees.find()))
+    return list(db.employees.find({}, {"_id": 0}))
+
+def iter_employees(department=None, batch_size=1000):
+    """Cursor over employees ordered by employee_id (for streaming, not buffered)."""
+    query = {"department": department} if department else {}
+    return db.employees.find(query, {"_id": 0}, batch_size=batch_size).sort("employee_id", 1)
 
+@timed("list_payroll")
 def list_payroll():
-    return fix_object_ids(list(db.payroll.find()))
+    return list(db.payroll.find({}, {"_id": 0}))
 
+@timed("list_attendance")
 def list_attendance():
-    return fix_object_ids(list(db.attendance.find()))
+    return list(db.attendance.find({}, {"_id": 0}))
+
+# ---------------- Paginated Access ----------------
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def _page(collection, key, query, after=None, page_size=DEFAULT_PAGE_SIZE, projection=None):
+    """
+    Keyset pagination: return one page of documents sorted by `key`
+    starting after the value `after`, plus the cursor for the next page
+    (None on the last page). Range scans on `key` avoid skip(). Documents
+    come back without `_id`, ready for templates and JSON.
+    """
+    page_size = max(1, min(int(page_size or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    query = dict(query)
+    if after is not None:
+        if key == "_id":
+            after = ObjectId(after)
+        query[key] = {"$gt": after}
+    if projection is None:
+        projection = {"_id": 0} if key != "_id" else None
+    else:
+        projection = {f: 1 for f in projection} if not isinstance(projection, dict) else dict(projection)
+        if any(projection.values()):
+            projection[key] = 1
+        projection["_id"] = int(key == "_id")
+
+    docs = list(collection.find(query, projection).sort(key, 1).limit(page_size + 1))
+    next_after = None
+    if len(docs) > page_size:
+        docs = docs[:page_size]
+        next_after = str(docs[-1][key])
+    if key == "_id":
+        # Only needed for the cursor
+        for d in docs:
+            del d["_id"]
+    return docs, next_after
+
+@timed("page_employees")
+def page_employees(after=None, page_size=DEFAULT_PAGE_SIZE, department=None, projection=None):
+    """One page of employees ordered by employee_id, optionally per department."""
+    query = {"department": department} if department else {}
+    return _page(db.employees, "employee_id", query, after, page_size, projection)
+
+@timed("page_payroll")
+def page_payroll(after=None, page_size=DEFAULT_PAGE_SIZE, status=None, employee_id=None, projection=None):
+    """One page of payroll rows ordered by _id, optionally filtered."""
+    query = {}
+    if status:
+        query["status"] = status
+    if employee_id:
+        query["employee_id"] = employee_id
+    return _page(db.payroll, "_id", query, after, page_size, projection)
+
+@timed("page_attendance")
+def page_attendance(after=None, page_size=DEFAULT_PAGE_SIZE, status=None, employee_id=None, projection=None):
+    """
+    One page of attendance rows. For a single employee the page is ordered
+    by date on the (employee_id, date) index, otherwise by _id.
+    """
+    query = {}
+    if status:
+        query["status"] = status
+    if employee_id:
+        query["employee_id"] = employee_id
+        return _page(db.attendance, "date", query, after, page_size, projection)
+    return _page(db.attendance, "_id", query, after, page_size, projection)
 
 #MACHINE LEARNING MODEL
+def _train_or_load(registry, fit, label, force=False):
+    """
+    Return the registry's current model, or fit and publish a new version.
+    Only one process trains at a time; the others wait on the lock and
+    then reuse the version it published.
+    """
+    if registry.current_version() and not force:
+        try:
+            return registry.get()
+        except Exception as e:
+            print(f"⚠️ {label} model load failed, retraining…", e)
+
+    os.makedirs(registry.path, exist_ok=True)
+    with model_file_lock(os.path.join(registry.path, "train")):
+        if registry.current_version() and not force:
+            try:
+                return registry.get()
+            except Exception as e:
+                print(f"⚠️ {label} model load failed, retraining…", e)
+
+        model, metadata = fit()
+        version = registry.publish(model, metadata)
+    print(f"✅ {label} Model Trained & Published: {registry.name} {version}")
+    return model
+
+
 # PAYROLL ANOMALY DETECTION MODEL
 def train_and_save_model(force=False):
     """
     Train a Machine Learning model to detect payroll anomalies
     based on employee performance, salary, tenure, and absence behaviour.
     """
+    return _train_or_load(payroll_registry, _fit_payroll_model, "Payroll Anomaly", force)
 
-    os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-
-    # Load existing model unless force retraining
-    if os.path.exists(MODEL_PATH) and not force:
-        try:
-            return joblib.load(MODEL_PATH)
-        except Exception as e:
-            print("⚠️ Payroll model load failed, retraining…", e)
-
-    # Fetch employees data from DB
-    employees = list_employees()
-    rows = []
-
-    for e in employees:
-        tenure = int(e.get("tenure_years", 0))
-        salary = int(e.get("salary", 30000))
-        absence = int(e.get("absence_count", 0))
-        perf = e.get("performance", "Average")
-        salary_pending = int(e.get("salary_pending", False))
-
-        perf_score = {
-            "Excellent": 3,
-            "Good": 2,
-            "Average": 1,
-            "Below Average": 0
-        }.get(perf, 1)
-
-        # -----------------------------
-        # LABEL DEFINITION (Anomaly = 1)
-        # -----------------------------
-        # Payroll anomaly conditions:
-        #
-        # 1. Salary pending
-        # 2. Absences >= 7
-        # 3. Very low performance
-        # 4. Salary mismatch (performance low but salary very high)
-        #
-        label = 1 if (
-            salary_pending == 1 or
-            absence >= 7 or
-            perf_score == 0 or
-            (perf_score <= 1 and salary > 60000)
-        ) else 0
-
-        rows.append([tenure, salary, perf_score, absence, label])
-
-    # Convert to DataFrame
-    df = pd.DataFrame(rows,
-                      columns=["tenure", "salary", "perf_score", "absence", "label"])
-
-    # Safety backup dataset
-    if len(df) < 5:
-        df = pd.DataFrame({
-            "tenure": [1, 2, 3, 4, 5, 6, 2, 3],
-            "salary": [30000, 40000, 60000, 45000, 35000, 75000, 32000, 41000],
-            "perf_score": [2, 3, 0, 2, 3, 0, 0, 2],
-            "absence": [0, 1, 10, 2, 0, 9, 4, 1],
-            "label": [0, 0, 1, 0, 0, 1, 1, 0]     # 1 = anomaly
-        })
-
-    # Train model
-    X = df[["tenure", "salary", "perf_score", "absence"]]
-    y = df["label"]
-
-    model = RandomForestClassifier(n_estimators=120,
-                                   max_depth=6,
-                                   random_state=42)
-    model.fit(X, y)
-
-    # Save model
-    joblib.dump(model, MODEL_PATH)
-    print("✅ Payroll Anomaly Model Trained & Saved:", MODEL_PATH)
-
-    return model
 
+def _fit_payroll_model():
+    """Fit the payroll anomaly RandomForest on the feature store."""
+    import feature_store, training
+    cols = feature_store.load_columns()
+    return training.fit_payroll(cols.X, cols.salary_pending)
 
 
 def load_model():
     """Load the payroll anomaly model."""
-    if os.path.exists(MODEL_PATH):
-        try:
-            return joblib.load(MODEL_PATH)
-        except:
-            return train_and_save_model(force=True)
-    return train_and_save_model(force=True)
+    try:
+        return payroll_registry.get()
+    except Exception:
+        return train_and_save_model(force=True)
 
 
 # ATTRITION PREDICTION MODEL
@@ -257,92 +332,57 @@ def train_attrition_model(force=False):
     Train a Machine Learning model to predict employee attrition (likelihood of leaving).
     Model uses performance, salary, tenure, and attendance behavior.
     """
+    return _train_or_load(attrition_registry, _fit_attrition_model, "Attrition", force)
 
-    os.makedirs(os.path.dirname(ATTRITION_MODEL_PATH), exist_ok=True)
 
-    # Load existing model unless force retrain
-    if os.path.exists(ATTRITION_MODEL_PATH) and not force:
-        try:
-            return joblib.load(ATTRITION_MODEL_PATH)
-        except Exception as e:
-            print("⚠️ Attrition model load failed, retraining…", e)
-
-    employees = list_employees()
-    rows = []
-
-    # Convert employee records to feature rows
-    for e in employees:
-        tenure = int(e.get("tenure_years", 0))
-        salary = int(e.get("salary", 30000))
-        absence = int(e.get("absence_count", 0))
-        performance = e.get("performance", "Average")
-
-        perf_score = {
-            "Excellent": 3,
-            "Good": 2,
-            "Average": 1,
-            "Below Average": 0
-        }.get(performance, 1)
-
-        # -------------------------------
-        # Attrition Label (1 = high risk)
-        # -------------------------------
-        # Realistic HR attrition factors:
-        #  1. Tenure <= 1 year (new employees leave more often)
-        #  2. Low performance
-        #  3. High absences
-        #  4. Salary too low for their job profile
-        #
-        label = 1 if (
-            tenure <= 1 or
-            perf_score == 0 or
-            absence >= 6 or
-            (performance == "Below Average" and salary < 35000)
-        ) else 0
-        rows.append([tenure, salary, perf_score, absence, label])
-    df = pd.DataFrame(rows, columns=["tenure", "salary", "perf_score", "absence", "label"])
-    # Safety fallback dataset
-    if len(df) < 5:
-        df = pd.DataFrame({
-            "tenure": [0, 1, 2, 3, 5, 7, 1, 0],
-            "salary": [28000, 35000, 45000, 60000, 70000, 80000, 32000, 30000],
-            "perf_score": [0, 1, 2, 3, 2, 3, 0, 1],
-            "absence": [7, 4, 2, 0, 1, 0, 8, 5],
-            "label": [1, 1, 0, 0, 0, 0, 1, 1]
-        })
-    # Train the attrition model
-    X = df[["tenure", "salary", "perf_score", "absence"]]
-    y = df["label"]
-    model = RandomForestClassifier(
-        n_estimators=120,
-        max_depth=6,
-        random_state=42
-    )
-    model.fit(X, y)
-    # Save model
-    joblib.dump(model, ATTRITION_MODEL_PATH)
-    print("✅ Attrition Model Trained & Saved:", ATTRITION_MODEL_PATH)
-    return model
+def _fit_attrition_model():
+    """Fit the attrition RandomForest on the feature store."""
+    import feature_store, training
+    cols = feature_store.load_columns()
+    return training.fit_attrition(cols.X)
 
 
 def load_attrition_model():
-    if os.path.exists(ATTRITION_MODEL_PATH):
-        try:
-            return joblib.load(ATTRITION_MODEL_PATH)
-        except:
-            return train_attrition_model(force=True)
+    try:
+        return attrition_registry.get()
+    except Exception:
+        return train_attrition_model(force=True)
 
-    return train_attrition_model(force=True)
 
-
-
-def add_trigger(event_type, message, employee_id=None):
-    """Insert a trigger record in the database"""
-    trigger_doc = {
-        "event_type": event_type,  # e.g., 'High Attrition Risk'
-        "message": message,
-        "employee_id": employee_id,
-        "timestamp": pd.Timestamp.now().isoformat()
-    }
-    db.triggers.insert_one(trigger_doc)
-    print(f"⚡ Trigger fired: {event_type} → {message}")
+# BOTH MODELS
+def train_models(force=False, parallel=False):
+    """
+    Load both models, or read the feature store once and fit both from
+    it (optionally in two parallel processes), then publish each version.
+    """
+    import feature_store, training
+
+    if not force and payroll_registry.current_version() and attrition_registry.current_version():
+        return train_and_save_model(), train_attrition_model()
+
+    os.makedirs(payroll_registry.path, exist_ok=True)
+    os.makedirs(attrition_registry.path, exist_ok=True)
+    with model_file_lock(os.path.join(payroll_registry.path, "train")), \
+            model_file_lock(os.path.join(attrition_registry.path, "train")):
+        if not force and payroll_registry.current_version() and attrition_registry.current_version():
+            return payroll_registry.get(), attrition_registry.get()
+
+        cols = feature_store.load_columns()
+        (payroll_model, payroll_meta), (attrition_model, attrition_meta) = \
+            training.fit_both(cols.X, cols.salary_pending, parallel=parallel)
+        payroll_registry.publish(payroll_model, payroll_meta)
+        attrition_registry.publish(attrition_model, attrition_meta)
+    print(f"✅ Models Trained & Published: payroll_risk {payroll_registry.version}, attrition {attrition_registry.version}")
+    return payroll_model, attrition_model
+
+
+# Publish fresh versions; running workers pick them up without a restart:
+#     python models.py --retrain [--parallel]
+if __name__ == "__main__":
+    import sys
+    if "--retrain" in sys.argv:
+        import feature_store
+        feature_store.refresh()
+        train_models(force=True, parallel="--parallel" in sys.argv)
+    for registry in (payroll_registry, attrition_registry):
+        print(registry.name, registry.current_version(), registry.metadata())
@@ -0,0 +1,123 @@
+# passwords.py - bcrypt hashing and verification on a bounded worker pool
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+from config import (
+    PASSWORD_POOL_WORKERS, PASSWORD_QUEUE_DEPTH, PASSWORD_TIMEOUT_SECONDS, PASSWORD_HASH_ROUNDS
+)
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the pool already holds its maximum of queued jobs, or a job times out."""
+
+
+# Plain bcrypt, same hash format Flask-Bcrypt produces. bcrypt releases
+# the GIL while hashing, so pool threads run on separate cores.
+# Only the first 72 bytes count, as with the bcrypt versions Flask-Bcrypt used.
+def _secret(password):
+    return password.encode("utf-8")[:72]
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(_secret(password), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(hashed, password):
+    try:
+        return bcrypt.checkpw(_secret(password), hashed.encode("utf-8"))
+    except ValueError:      # malformed stored hash
+        return False
+
+
+def _done(value):
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+
+class PasswordPool:
+    """
+    Runs bcrypt on at most `workers` pool threads, so a login storm can't
+    occupy every core with request threads. At most `workers + queue_depth`
+    jobs may be in flight; beyond that calls fail fast with
+    PasswordPoolBusy so callers can answer 503 instead of piling up; a job
+    still unfinished after `timeout` seconds raises PasswordPoolBusy too.
+    workers=0 hashes inline in the calling thread. submit_hash/submit_check
+    return the job's future instead of waiting on it (async callers).
+    """
+
+    def __init__(self, workers=PASSWORD_POOL_WORKERS, queue_depth=PASSWORD_QUEUE_DEPTH,
+                 rounds=PASSWORD_HASH_ROUNDS):
+        self.workers = max(0, int(workers))
+        self.rounds = int(rounds)
+        self._slots = threading.BoundedSemaphore(self.workers + max(0, int(queue_depth)))
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="bcrypt")
+        return self._executor
+
+    def _submit(self, fn, *args):
+        """Queue a job and return its future; PasswordPoolBusy if the pool is full."""
+        if self.workers == 0:
+            return _done(fn(*args))
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordPoolBusy()
+        try:
+            fut = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def _run(self, fn, *args, timeout=PASSWORD_TIMEOUT_SECONDS):
+        fut = self._submit(fn, *args)
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            self.timed_out += 1
+            raise PasswordPoolBusy() from None
+
+    def submit_hash(self, password):
+        return self._submit(_hash, password, self.rounds)
+
+    def submit_check(self, hashed, password):
+        if not hashed:
+            return _done(False)
+        return self._submit(_check, hashed, password)
+
+    def hash(self, password, timeout=PASSWORD_TIMEOUT_SECONDS):
+        return self._run(_hash, password, self.rounds, timeout=timeout)
+
+    def check(self, hashed, password, timeout=PASSWORD_TIMEOUT_SECONDS):
+        if not hashed:
+            return False
+        return self._run(_check, hashed, password, timeout=timeout)
+
+    def hash_many(self, passwords):
+        """Hash a batch in parallel (seeding/bulk user creation; not queue-limited)."""
+        passwords = list(passwords)
+        if self.workers == 0 or len(passwords) < 2:
+            return [_hash(p, self.rounds) for p in passwords]
+        return list(self._get_executor().map(_hash, passwords, [self.rounds] * len(passwords)))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+pool = PasswordPool()
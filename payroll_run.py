@@ -0,0 +1,245 @@
+# payroll_run.py - Monthly payroll runs: bulk generation, status transitions and run summaries
+#
+#     python payroll_run.py generate 2025-10
+#     python payroll_run.py advance 2025-10 processed      # pending -> processed
+#     python payroll_run.py advance 2025-10 paid           # processed -> paid
+#     python payroll_run.py show [2025-10]
+#
+# A run writes one payroll row per employee for the month with unordered
+# bulk upserts on the (employee_id, month) unique index, so re-running a
+# month only adds rows for employees that are new since. Status changes
+# are single update_many calls per month. Every month has a summary
+# document in payroll_runs (row counts per status, total amount), kept
+# up to date with $inc as rows are written or moved, which is what the
+# dashboard reads instead of counting payroll rows.
+
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime, timezone
+
+from pymongo import UpdateOne
+
+from config import PAYROLL_RUN_BATCH_SIZE
+from models import db, employee_cache, ensure_indexes
+import read_models
+from feature_store import TRUTHY_STRINGS
+
+STATUSES = ("pending", "processed", "paid")
+# target status -> the only status it can be reached from
+TRANSITIONS = {"processed": "pending", "paid": "processed"}
+
+EMPLOYEE_PROJECTION = {"_id": 0, "employee_id": 1, "salary": 1}
+
+
+def validate_month(month):
+    """'YYYY-MM' or ValueError."""
+    month = str(month).strip()
+    try:
+        date.fromisoformat(month + "-01")
+    except ValueError:
+        month = None
+    if month is None or len(month) != 7:
+        raise ValueError("month must look like YYYY-MM")
+    return month
+
+
+def monthly_amount(employee):
+    """Monthly pay: employees.salary is already the monthly figure (as in seeded payroll)."""
+    return int(employee.get("salary", 30000))
+
+
+def payroll_id(month, employee_id):
+    return f"PAY{month.replace('-', '')}-{employee_id}"
+
+
+def _bump_summary(month, inc, **fields):
+    """$inc counters on the month's summary document (created on first use)."""
+    now = datetime.now(timezone.utc).isoformat()
+    update = {"$set": {"updated_at": now, **fields}, "$setOnInsert": {"month": month, "created_at": now}}
+    if inc:
+        # MongoDB < 5.0 rejects an empty $inc
+        update["$inc"] = inc
+    db.payroll_runs.update_one({"month": month}, update, upsert=True)
+
+
+def _invalidate_views():
+    # Payroll rows are part of the cached HR employee view
+    read_models.profile_cache.clear()
+
+
+# -------------------- SALARY_PENDING NORMALIZATION --------------------
+def normalize_salary_pending():
+    """
+    Rewrite non-boolean employees.salary_pending values ("true", "Yes",
+    "pending", 1, missing, ...) as real booleans, with the same meaning
+    feature_store.to_bool gives them. Returns the number of documents fixed.
+    """
+    truthy = {"$regex": r"^\s*(%s)\s*$" % "|".join(TRUTHY_STRINGS), "$options": "i"}
+    fixed = db.employees.update_many(
+        {"$or": [{"salary_pending": {"$type": "string", **truthy}},
+                 {"salary_pending": {"$type": "number", "$eq": 1}}]},
+        {"$set": {"salary_pending": True}},
+    ).modified_count
+    fixed += db.employees.update_many(
+        {"salary_pending": {"$not": {"$type": "bool"}}},
+        {"$set": {"salary_pending": False}},
+    ).modified_count
+    if fixed:
+        employee_cache.clear()
+        _invalidate_views()
+    return fixed
+
+
+# -------------------- GENERATE --------------------
+def generate_run(month, batch_size=PAYROLL_RUN_BATCH_SIZE, progress=None):
+    """
+    Create the month's pending payroll row for every employee that has
+    none yet. Returns a report with counts and timing.
+    """
+    month = validate_month(month)
+    started = time.perf_counter()
+    normalized = normalize_salary_pending()
+    now = datetime.now(timezone.utc).isoformat()
+    report = {"month": month, "employees": 0, "created": 0, "amount": 0, "normalized": normalized}
+
+    def flush(batch):
+        ops, amounts = [], []
+        for e in batch:
+            amount = monthly_amount(e)
+            ops.append(UpdateOne(
+                {"employee_id": e["employee_id"], "month": month},
+                {"$setOnInsert": {
+                    "payroll_id": payroll_id(month, e["employee_id"]),
+                    "employee_id": e["employee_id"],
+                    "month": month,
+                    "amount": amount,
+                    "status": "pending",
+                    "created_at": now,
+                }},
+                upsert=True,
+            ))
+            amounts.append(amount)
+        result = db.payroll.bulk_write(ops, ordered=False)
+        created = result.upserted_count
+        amount = sum(amounts[i] for i in result.upserted_ids)
+        if created:
+            _bump_summary(month, {"employees": created, "total_amount": amount, "counts.pending": created})
+        report["employees"] += len(batch)
+        report["created"] += created
+        report["amount"] += amount
+        if progress is not None:
+            progress(report)
+
+    batch = []
+    for e in db.employees.find({}, EMPLOYEE_PROJECTION, batch_size=batch_size):
+        batch.append(e)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    report["duration_s"] = round(time.perf_counter() - started, 3)
+    _bump_summary(month, {}, generated_at=now, last_generate=report)
+    _invalidate_views()
+    return report
+
+
+# -------------------- STATUS TRANSITIONS --------------------
+def advance(month, status, employee_ids=None):
+    """
+    Move the month's rows to `status` ("processed" or "paid") from the
+    status before it, for everyone or only `employee_ids`. Returns how
+    many rows moved.
+    """
+    month = validate_month(month)
+    if status not in TRANSITIONS:
+        raise ValueError(f"status must be one of {', '.join(TRANSITIONS)}")
+    previous = TRANSITIONS[status]
+    query = {"month": month, "status": previous}
+    if employee_ids is not None:
+        query["employee_id"] = {"$in": list(employee_ids)}
+
+    now = datetime.now(timezone.utc).isoformat()
+    moved = db.payroll.update_many(query, {"$set": {"status": status, f"{status}_at": now}}).modified_count
+    if moved:
+        _bump_summary(month, {f"counts.{previous}": -moved, f"counts.{status}": moved}, **{f"{status}_at": now})
+        _invalidate_views()
+    return moved
+
+
+# -------------------- SUMMARIES --------------------
+def refresh_summaries(months=None):
+    """
+    Recount payroll_runs from the payroll rows (all months, or only
+    `months`), for rows written outside a run: seed data, bulk imports,
+    datagen. Returns the months refreshed.
+    """
+    match = {"month": {"$in": list(months)}} if months is not None else {}
+    groups = db.payroll.aggregate([
+        {"$match": match},
+        # Rows imported without a status count as pending
+        {"$group": {"_id": {"month": "$month", "status": {"$ifNull": ["$status", "pending"]}},
+                    "count": {"$sum": 1}, "amount": {"$sum": "$amount"}}},
+    ])
+    summaries = {}
+    for g in groups:
+        s = summaries.setdefault(g["_id"]["month"], {"employees": 0, "total_amount": 0,
+                                                     "counts": dict.fromkeys(STATUSES, 0)})
+        s["employees"] += g["count"]
+        s["total_amount"] += g["amount"]
+        status = g["_id"].get("status") or "pending"
+        s["counts"][status] = s["counts"].get(status, 0) + g["count"]
+
+    now = datetime.now(timezone.utc).isoformat()
+    if summaries:
+        db.payroll_runs.bulk_write([
+            UpdateOne({"month": month}, {"$set": {**s, "updated_at": now},
+                                         "$setOnInsert": {"month": month, "created_at": now}}, upsert=True)
+            for month, s in summaries.items()
+        ], ordered=False)
+    return sorted(summaries)
+
+
+def get_run(month):
+    return db.payroll_runs.find_one({"month": month}, {"_id": 0})
+
+
+def recent_runs(limit=6):
+    """Latest months first."""
+    return list(db.payroll_runs.find({}, {"_id": 0, "last_generate": 0}).sort("month", -1).limit(limit))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monthly payroll runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="create the month's pending payroll rows")
+    gen.add_argument("month")
+    gen.add_argument("--batch-size", type=int, default=PAYROLL_RUN_BATCH_SIZE)
+    adv = sub.add_parser("advance", help="pending -> processed, or processed -> paid")
+    adv.add_argument("month")
+    adv.add_argument("status", choices=sorted(TRANSITIONS))
+    show = sub.add_parser("show", help="run summaries")
+    show.add_argument("month", nargs="?")
+    sub.add_parser("refresh", help="recount every summary from the payroll rows")
+    args = parser.parse_args(argv)
+
+    ensure_indexes()
+    if args.command == "generate":
+        report = generate_run(args.month, args.batch_size,
+                              progress=lambda r: print(f"… {r['employees']:,} employees", file=sys.stderr))
+        print(f"✅ {report}")
+    elif args.command == "advance":
+        print(f"✅ {advance(args.month, args.status)} row(s) -> {args.status}")
+    elif args.command == "refresh":
+        print(f"✅ Refreshed {refresh_summaries()}")
+    else:
+        runs = [get_run(args.month)] if args.month else recent_runs()
+        print(json.dumps(runs, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# profiling.py - Per-request phase timing, Server-Timing headers and opt-in cProfile
+#
+#     with phase("stats"):
+#         stats = dashboard_stats(department)
+#
+# Every request gets a timing breakdown: named phases, MongoDB time (from
+# db_metrics), Jinja rendering and the total. It is sent as a Server-Timing
+# header and logged as one structured line. A request is profiled with
+# cProfile when it carries PROFILE_HEADER: PROFILE_TOKEN or is picked by
+# PROFILE_SAMPLE_RATE; the .prof file lands in PROFILE_DIR.
+
+import contextvars
+import cProfile
+import os
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+
+from flask import before_render_template, g, request, template_rendered
+
+import db_metrics
+from config import (
+    DB_METRICS_ENABLED, SERVER_TIMING_ENABLED, PROFILE_HEADER, PROFILE_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_DIR
+)
+from logs import get_logger
+
+log = get_logger("requests")
+
+# name -> accumulated ms for the current request (None outside requests)
+_phases = contextvars.ContextVar("request_phases", default=None)
+
+
+@contextmanager
+def phase(name):
+    """Time a block as `name` in the current request (no-op outside one)."""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + (time.perf_counter() - start) * 1000.0
+
+
+def _wants_profile():
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _dump_profile(profiler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = re.sub(r"[^A-Za-z0-9_.-]", "_", request.endpoint or "unknown")
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+def _server_timing(phases, db_totals, total_ms):
+    parts = [f"{name};dur={ms:.1f}" for name, ms in phases.items()]
+    if db_totals is not None:
+        parts.append(f'mongo;dur={db_totals["ms"]:.1f};desc="{db_totals["count"]} cmds"')
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def init_app(app):
+    """Register the timing/profiling hooks on a Flask app."""
+
+    @app.before_request
+    def _start():
+        # Mongo time comes from the db_metrics command listener, when enabled
+        db_totals = {"count": 0, "ms": 0.0} if DB_METRICS_ENABLED else None
+        g.timing_tokens = (_phases.set({}), db_metrics.request_totals.set(db_totals))
+        g.timing_start = time.perf_counter()
+        g.profiler = None
+        if _wants_profile():
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def _finish(response):
+        start = g.get("timing_start")
+        if start is None:
+            return response
+        total_ms = (time.perf_counter() - start) * 1000.0
+        phases = _phases.get() or {}
+        db_totals = db_metrics.request_totals.get()
+
+        profile_path = None
+        if g.get("profiler") is not None:
+            g.profiler.disable()
+            profile_path = _dump_profile(g.profiler)
+            g.profiler = None
+
+        if SERVER_TIMING_ENABLED:
+            response.headers["Server-Timing"] = _server_timing(phases, db_totals, total_ms)
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round(total_ms, 2),
+            "phases_ms": {k: round(v, 2) for k, v in phases.items()},
+        }
+        if db_totals is not None:
+            fields["db_ms"] = round(db_totals["ms"], 2)
+            fields["db_commands"] = db_totals["count"]
+        if profile_path:
+            fields["profile"] = profile_path
+        log.info("request", extra={"fields": fields})
+        return response
+
+    @app.teardown_request
+    def _reset(exc):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:     # the view raised before after_request
+            profiler.disable()
+        tokens = g.pop("timing_tokens", None)
+        if tokens is not None:
+            _phases.reset(tokens[0])
+            db_metrics.request_totals.reset(tokens[1])
+
+    # Jinja rendering as its own phase
+    def _render_started(sender, template, context, **extra):
+        g.render_start = time.perf_counter()
+
+    def _render_finished(sender, template, context, **extra):
+        start = g.pop("render_start", None)
+        phases = _phases.get()
+        if start is not None and phases is not None:
+            phases["render"] = phases.get("render", 0.0) + (time.perf_counter() - start) * 1000.0
+
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
@@ -0,0 +1,112 @@
+# read_models.py - Cached per-employee read model for the HR employee view
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+
+from cache import TTLCache
+from config import EMPLOYEE_VIEW_CACHE_SIZE, EMPLOYEE_VIEW_CACHE_TTL, ATTENDANCE_VIEW_LIMIT
+from models import db, invalidate_employees
+from db_metrics import timed
+
+# Profile + payroll + rollup per employee, and attendance pages. Unknown
+# employees aren't cached: another process may be creating them
+profile_cache = TTLCache("employee_profile", EMPLOYEE_VIEW_CACHE_SIZE, EMPLOYEE_VIEW_CACHE_TTL,
+                         cache_none=False)
+attendance_cache = TTLCache("employee_attendance", EMPLOYEE_VIEW_CACHE_SIZE * 4, EMPLOYEE_VIEW_CACHE_TTL)
+
+# Bumped on every write for an employee; part of every cache key, so a
+# bump makes all of that employee's cached pages unreachable at once
+_generations = {}
+_gen_lock = threading.Lock()
+
+
+def _generation(eid):
+    return _generations.get(eid, 0)
+
+
+def invalidate_employee(*employee_ids):
+    """Drop cached views and documents for these employees (call after any write)."""
+    with _gen_lock:
+        for eid in employee_ids:
+            _generations[eid] = _generations.get(eid, 0) + 1
+    invalidate_employees(*employee_ids)
+
+
+def stamp(payload):
+    """Attach an ETag (content hash) and Last-Modified (build time)."""
+    body = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return {
+        "data": payload,
+        "etag": hashlib.sha1(body).hexdigest(),
+        "last_modified": datetime.now(timezone.utc).replace(microsecond=0),
+    }
+
+
+def profile_key(eid):
+    return (eid, _generation(eid))
+
+
+@timed("employee_profile")
+def employee_profile(eid):
+    """Employee document, payroll history and attendance rollup."""
+    def load():
+        emp = db.employees.find_one({"employee_id": eid}, {"_id": 0})
+        if emp is None:
+            return None
+        payrolls = list(db.payroll.find({"employee_id": eid}, {"_id": 0}).sort("month", -1))
+        rollup = db.attendance_rollups.find_one({"employee_id": eid}, {"_id": 0, "ring": 0})
+        return stamp({"emp": emp, "payrolls": payrolls, "rollup": rollup})
+    return profile_cache.get_or_load(profile_key(eid), load)
+
+
+def view_etag(profile, attendance):
+    """ETag of an HR employee view page (profile + one attendance page)."""
+    return f'{profile["etag"][:20]}-{attendance["etag"][:20]}'
+
+
+def attendance_limit(limit):
+    return max(1, min(int(limit or ATTENDANCE_VIEW_LIMIT), 500))
+
+
+def attendance_key(eid, date_from, date_to, before, limit):
+    return (eid, _generation(eid), date_from, date_to, before, limit)
+
+
+def attendance_query(eid, date_from=None, date_to=None, before=None):
+    date_q = {}
+    if date_from:
+        date_q["$gte"] = date_from
+    if date_to:
+        date_q["$lte"] = date_to
+    if before:
+        date_q["$lt"] = before
+    query = {"employee_id": eid}
+    if date_q:
+        query["date"] = date_q
+    return query
+
+
+def attendance_page(rows, limit):
+    """Stamp a page fetched with limit + 1 rows; the extra row marks more."""
+    next_before = rows[limit - 1]["date"] if len(rows) > limit else None
+    return stamp({"attendance": rows[:limit], "next_before": next_before})
+
+
+@timed("attendance_range")
+def attendance_range(eid, date_from=None, date_to=None, before=None, limit=ATTENDANCE_VIEW_LIMIT):
+    """
+    Newest-first attendance for one employee inside [date_from, date_to],
+    `limit` rows at a time; `before` is the cursor for older rows. Served
+    by the (employee_id, date) index.
+    """
+    limit = attendance_limit(limit)
+
+    def load():
+        rows = list(db.attendance.find(attendance_query(eid, date_from, date_to, before),
+                                       {"_id": 0, "date": 1, "status": 1})
+                    .sort("date", -1).limit(limit + 1))
+        return attendance_page(rows, limit)
+
+    return attendance_cache.get_or_load(attendance_key(eid, date_from, date_to, before, limit), load)
@@ -0,0 +1,74 @@
+# risk_store.py - Persisted risk scores with incremental rescoring
+
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import db
+from db_metrics import timed
+from scoring import predict_batched, positive_proba_batched
+
+
+@timed("refresh_risk_scores")
+def refresh_risk_scores(features, payroll_model, attrition_model, model_version):
+    """
+    Rescore only the employees (rows of a feature_store.FeatureColumns)
+    whose feature hash or model version changed since their stored entry
+    in `risk_scores`. Returns the number rescored.
+    """
+    if not len(features):
+        return 0
+
+    ids = list(features.employee_ids)
+    stored = {
+        d["employee_id"]: d
+        for d in db.risk_scores.find(
+            {"employee_id": {"$in": ids}},
+            {"_id": 0, "employee_id": 1, "feature_hash": 1, "model_version": 1}
+        )
+    }
+
+    stale = []
+    for i, eid in enumerate(ids):
+        s = stored.get(eid)
+        if s is None or s.get("feature_hash") != features.hashes[i] or s.get("model_version") != model_version:
+            stale.append(i)
+
+    if not stale:
+        return 0
+
+    X_stale = features.X[stale]
+    payroll_pred = predict_batched(payroll_model, X_stale)
+    attr_prob = positive_proba_batched(attrition_model, X_stale)
+    now = datetime.now(timezone.utc).isoformat()
+
+    ops = []
+    for j, i in enumerate(stale):
+        eid = ids[i]
+        ops.append(UpdateOne(
+            {"employee_id": eid},
+            {"$set": {
+                "employee_id": eid,
+                "payroll_risk": bool(payroll_pred[j]),
+                "attrition_prob": float(attr_prob[j]),
+                "feature_hash": features.hashes[i],
+                "model_version": model_version,
+                "scored_at": now,
+            }},
+            upsert=True,
+        ))
+    try:
+        db.risk_scores.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent pass inserted the same employee first; its row is as fresh
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    return len(stale)
+
+
+@timed("get_risk_scores")
+def get_risk_scores(employee_ids=None):
+    """Read stored risk scores as a dict keyed by employee_id."""
+    query = {} if employee_ids is None else {"employee_id": {"$in": list(employee_ids)}}
+    return {d["employee_id"]: d for d in db.risk_scores.find(query, {"_id": 0})}
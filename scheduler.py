@@ -0,0 +1,364 @@
+# scheduler.py - Periodic background scoring and trigger evaluation
+#
+# Walks the workforce in employee_id batches, rescores changed employees
+# into risk_scores and fires trigger rules, every SCORING_INTERVAL_SECONDS,
+# whether or not anyone has the dashboard open. Runs as a thread inside
+# the web app (SCHEDULER_ENABLED) or as its own worker process:
+#
+#     python scheduler.py            # loop forever
+#     python scheduler.py --once     # a single pass (e.g. from cron)
+#
+# A lease document in MongoDB makes sure only one process runs a pass at a
+# time, however many web workers or scheduler processes are up.
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import (
+    SCORING_INTERVAL_SECONDS, SCORING_BATCH_SIZE, SCORING_CONCURRENCY, SCHEDULER_LEASE_SECONDS
+)
+from models import db, payroll_registry, attrition_registry
+from risk_store import refresh_risk_scores, get_risk_scores
+from triggers import TriggerEngine
+from logs import get_logger
+import feature_store
+
+log = get_logger("scheduler")
+
+# Trigger rules
+ATTRITION_TRIGGER_PROB = 0.8
+ABSENCE_TRIGGER_COUNT = 5
+
+# Attrition probability the dashboard counts as "at risk"
+ATTRITION_RISK_PROB = 0.5
+
+# Only the fields the models, trigger messages and risk counts need
+SCORING_PROJECTION = {"_id": 0, "employee_id": 1, "name": 1, "department": 1, "absence_count": 1}
+
+LEASE_NAME = "score_workforce"
+
+
+class LeaseLost(Exception):
+    """The scoring lease expired or was taken over mid-pass; the pass stops."""
+
+
+def current_models():
+    """
+    (payroll_model, attrition_model, model_version) from the registries.
+    Picks up newly published versions without a restart; stored risk
+    scores are recomputed whenever the combined version changes.
+    """
+    payroll_model = payroll_registry.get()
+    attrition_model = attrition_registry.get()
+    return payroll_model, attrition_model, f"{payroll_registry.version}:{attrition_registry.version}"
+
+
+def evaluate_triggers(employees, scores, engine):
+    """Add trigger events for one batch of employees and their stored scores."""
+    for e in employees:
+        score = scores.get(e["employee_id"], {})
+        attr_prob = score.get("attrition_prob", 0.0)
+
+        if attr_prob > ATTRITION_TRIGGER_PROB:
+            engine.add(
+                event_type="High Attrition Risk",
+                message=f"Employee {e['name']} ({e['employee_id']}) shows {attr_prob*100:.1f}% chance of leaving.",
+                employee_id=e["employee_id"]
+            )
+
+        if score.get("payroll_risk"):
+            engine.add(
+                event_type="Payroll Anomaly",
+                message=f"Payroll irregularity detected for {e['name']} ({e['employee_id']}).",
+                employee_id=e["employee_id"]
+            )
+
+        if e.get("absence_count", 0) > ABSENCE_TRIGGER_COUNT:
+            engine.add(
+                event_type="High Absence",
+                message=f"{e['name']} ({e['employee_id']}) has {e['absence_count']} absences.",
+                employee_id=e["employee_id"]
+            )
+
+
+def count_risks(employees, scores, counts):
+    """Add a batch's at-risk employees to `counts`: department -> [payroll, attrition]."""
+    for e in employees:
+        score = scores.get(e["employee_id"], {})
+        c = counts.setdefault(e.get("department"), [0, 0])
+        c[0] += bool(score.get("payroll_risk"))
+        c[1] += score.get("attrition_prob", 0.0) > ATTRITION_RISK_PROB
+    return counts
+
+
+def score_batch(employees, models):
+    """Rescore one batch and write its trigger events; returns (rescored, fired, risk counts)."""
+    payroll_model, attrition_model, model_version = models
+    ids = [e["employee_id"] for e in employees]
+    features = feature_store.load_columns(ids)
+    rescored = refresh_risk_scores(features, payroll_model, attrition_model, model_version)
+    scores = get_risk_scores(ids)
+    engine = TriggerEngine()
+    evaluate_triggers(employees, scores, engine)
+    return rescored, engine.flush(), count_risks(employees, scores, {})
+
+
+def employee_batches(batch_size=SCORING_BATCH_SIZE):
+    """Keyset-paged batches of employees ordered by employee_id."""
+    after = None
+    while True:
+        query = {} if after is None else {"employee_id": {"$gt": after}}
+        batch = list(db.employees.find(query, SCORING_PROJECTION).sort("employee_id", 1).limit(batch_size))
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1]["employee_id"]
+
+
+def score_workforce(batch_size=SCORING_BATCH_SIZE, concurrency=SCORING_CONCURRENCY, on_batch=None):
+    """
+    One full pass: batches are scored on `concurrency` threads (model
+    inference and MongoDB I/O both release the GIL). `on_batch` is called
+    after each batch, e.g. to renew a lease. Returns a summary dict,
+    including the pass's at-risk counts per department (see risk_counts).
+    """
+    models = current_models()
+    summary = {"employees": 0, "batches": 0, "rescored": 0, "fired": 0, "model_version": models[2],
+               "risk_counts": []}
+    concurrency = max(1, int(concurrency))
+    by_department = {}
+
+    def done(batch, result):
+        rescored, fired, counts = result
+        summary["employees"] += len(batch)
+        summary["batches"] += 1
+        summary["rescored"] += rescored
+        summary["fired"] += fired
+        for dept, (payroll, attrition) in counts.items():
+            c = by_department.setdefault(dept, [0, 0])
+            c[0] += payroll
+            c[1] += attrition
+        # A list, not a dict: department names are free text and can't all be field names
+        summary["risk_counts"] = [{"department": d, "payroll": p, "attrition": a}
+                                  for d, (p, a) in by_department.items()]
+        if on_batch is not None:
+            on_batch(summary)
+
+    if concurrency == 1:
+        for batch in employee_batches(batch_size):
+            done(batch, score_batch(batch, models))
+        return summary
+
+    # Keep at most 2x concurrency batches in flight so memory stays bounded
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="hris-scoring") as pool:
+        pending = []
+        try:
+            for batch in employee_batches(batch_size):
+                pending.append((batch, pool.submit(score_batch, batch, models)))
+                if len(pending) >= 2 * concurrency:
+                    b, fut = pending.pop(0)
+                    done(b, fut.result())
+            while pending:
+                b, fut = pending.pop(0)
+                done(b, fut.result())
+        except BaseException:
+            # e.g. on_batch raised: don't start the batches still queued
+            for _, fut in pending:
+                fut.cancel()
+            raise
+    return summary
+
+
+# -------------------- LEASE --------------------
+class Lease:
+    """
+    Mutual exclusion across processes through one document in
+    scheduler_leases. Holding it expires after `ttl` seconds unless renewed,
+    so a crashed holder can't block scoring forever.
+    """
+
+    def __init__(self, name=LEASE_NAME, ttl=SCHEDULER_LEASE_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    def acquire(self):
+        now = datetime.now(timezone.utc)
+        try:
+            doc = db.scheduler_leases.find_one_and_update(
+                {"_id": self.name, "$or": [{"expires_at": {"$lte": now}}, {"owner": self.owner}]},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:     # held by someone else (the upsert lost)
+            return False
+        return doc is not None and doc.get("owner") == self.owner
+
+    renew = acquire
+
+    def release(self, **status):
+        """Give the lease up, recording the outcome of the pass on the document."""
+        db.scheduler_leases.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"expires_at": datetime.now(timezone.utc), **status}},
+        )
+
+
+# -------------------- SCHEDULER --------------------
+class Scheduler:
+    """
+    Runs score_workforce every `interval` seconds on a daemon thread,
+    guarded by a Lease. status() reports the last pass in this process.
+    """
+
+    def __init__(self, interval=SCORING_INTERVAL_SECONDS, batch_size=SCORING_BATCH_SIZE,
+                 concurrency=SCORING_CONCURRENCY):
+        self.interval = max(1.0, float(interval))
+        self.batch_size = max(1, int(batch_size))
+        self.concurrency = max(1, int(concurrency))
+        self.lease = Lease()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_run = None
+        self.last_error = None
+        self.runs = 0
+        self.skipped = 0
+
+    def _renew(self, summary):
+        if not self.lease.renew():
+            raise LeaseLost(f"scoring lease lost after {summary['batches']} batch(es)")
+
+    def run_once(self):
+        """
+        One leased pass; returns its summary, or None if another process
+        holds the lease (or takes it over before the pass finishes).
+        """
+        if not self.lease.acquire():
+            self.skipped += 1
+            return None
+        started = time.perf_counter()
+        finished_at = None
+        try:
+            summary = score_workforce(self.batch_size, self.concurrency, on_batch=self._renew)
+            summary["duration_s"] = round(time.perf_counter() - started, 3)
+            finished_at = datetime.now(timezone.utc).isoformat()
+            summary["finished_at"] = finished_at
+            self.last_run = summary
+            self.last_error = None
+            self.runs += 1
+            log.info(f"🧮 Scored {summary['employees']} employees ({summary['rescored']} rescored, "
+                     f"{summary['fired']} trigger(s) fired) in {summary['duration_s']}s",
+                     extra={"fields": summary})
+            return summary
+        except LeaseLost as e:
+            # The new holder runs its own pass; release() below no longer matches our owner
+            self.last_error = repr(e)
+            log.warning(f"⚠️ {e}; stopping this pass")
+            return None
+        except Exception as e:
+            self.last_error = repr(e)
+            log.exception("scoring pass failed")
+            raise
+        finally:
+            self.lease.release(last_run=self.last_run, last_error=self.last_error, last_finished_at=finished_at)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass                    # logged in run_once; try again next interval
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the background thread (first pass runs immediately)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="hris-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_s": self.interval,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "last_run": self.last_run,
+            "last_error": self.last_error,
+        }
+
+
+def last_scoring_run():
+    """The outcome of the most recent pass by any process (from the lease document)."""
+    doc = db.scheduler_leases.find_one({"_id": LEASE_NAME}, {"_id": 0, "last_run": 1, "last_error": 1})
+    return doc or {}
+
+
+def risk_counts(scoring, department=None):
+    """
+    (payroll_risk, attrition_risk) employee counts from a last_scoring_run()
+    document, for everyone or one department; zeros before the first pass.
+    """
+    rows = ((scoring or {}).get("last_run") or {}).get("risk_counts") or []
+    rows = [r for r in rows if department is None or r.get("department") == department]
+    return sum(r["payroll"] for r in rows), sum(r["attrition"] for r in rows)
+
+
+scheduler = Scheduler()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Background workforce scoring and trigger evaluation")
+    parser.add_argument("--once", action="store_true", help="run a single pass and exit")
+    parser.add_argument("--interval", type=float, default=SCORING_INTERVAL_SECONDS)
+    parser.add_argument("--batch-size", type=int, default=SCORING_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=SCORING_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    # Models come from the registry (published by the web app or models.py --retrain)
+    from models import train_models
+    from triggers import ensure_trigger_indexes
+    ensure_trigger_indexes()
+    feature_store.ensure_feature_indexes()
+    train_models()
+
+    worker = Scheduler(args.interval, args.batch_size, args.concurrency)
+    if args.once:
+        summary = worker.run_once()
+        print(f"✅ {summary}" if summary else "⏭️ Another process holds the scoring lease")
+        return 0
+    print(f"⏱️ Scoring every {worker.interval:.0f}s (batch {worker.batch_size}, concurrency {worker.concurrency})")
+    worker.start()
+    try:
+        while worker._thread.is_alive():
+            worker._thread.join(1.0)
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
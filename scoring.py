@@ -0,0 +1,33 @@
+# scoring.py - Chunked predict helpers for the payroll and attrition models
+
+import numpy as np
+
+# Rows scored per predict call; keeps the per-tree temporaries bounded
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def _chunks(n, chunk_size):
+    chunk_size = max(1, int(chunk_size or n or 1))
+    for start in range(0, n, chunk_size):
+        yield start, min(start + chunk_size, n)
+
+
+def predict_batched(model, X, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run model.predict over X in bounded chunks."""
+    out = np.empty(len(X), dtype=np.int64)
+    for start, stop in _chunks(len(X), chunk_size):
+        out[start:stop] = model.predict(X[start:stop])
+    return out
+
+
+def positive_proba_batched(model, X, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Probability of class 1 for every row of X, scored in bounded chunks."""
+    out = np.zeros(len(X), dtype=np.float64)
+    classes = list(getattr(model, "classes_", [0, 1]))
+    if 1 not in classes:
+        return out
+    col = classes.index(1)
+    for start, stop in _chunks(len(X), chunk_size):
+        out[start:stop] = model.predict_proba(X[start:stop])[:, col]
+    return out
+
@@ -0,0 +1,41 @@
+# serialize.py - Fast JSON encoding for API responses
+#
+# Uses orjson when it is installed (it encodes straight to bytes, several
+# times faster than the json module) and the standard library otherwise.
+# Documents reach here without `_id` (the data layer projects it away), so
+# there is no ObjectId walk; anything else non-JSON falls back to str().
+
+import json
+
+from config import API_STREAM_CHUNK_SIZE
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(obj):
+    """obj as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, default=str, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def stream_array(docs, chunk_size=API_STREAM_CHUNK_SIZE):
+    """
+    Yield `docs` (any iterable, e.g. a cursor) as one JSON array, encoding
+    chunk_size documents per call so memory stays flat at any size.
+    """
+    yield b"["
+    first = True
+    chunk = []
+    for d in docs:
+        chunk.append(d)
+        if len(chunk) >= chunk_size:
+            yield (b"" if first else b",") + dumps(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b"" if first else b",") + dumps(chunk)[1:-1]
+    yield b"]"
@@ -0,0 +1,74 @@
+# stats.py - Dashboard statistics computed inside MongoDB with aggregation pipelines
+
+from models import db
+from db_metrics import timed
+
+def employee_stats_pipeline(department=None):
+    """The $facet pipeline behind employee_stats (shared with the async app)."""
+    match = {"department": department} if department else {}
+    pipeline = [
+        {"$match": match},
+        {"$facet": {
+            "totals": [
+                {"$group": {"_id": None,
+                            "total": {"$sum": 1},
+                            "avg_salary": {"$avg": "$salary"}}}
+            ],
+            "departments": [
+                {"$group": {"_id": "$department",
+                            "headcount": {"$sum": 1},
+                            "avg_salary": {"$avg": "$salary"},
+                            "min_salary": {"$min": "$salary"},
+                            "max_salary": {"$max": "$salary"}}},
+                {"$sort": {"_id": 1}}
+            ],
+        }},
+    ]
+    return pipeline
+
+
+def shape_employee_stats(result):
+    """Flatten the $facet result document for the templates."""
+    result = result or {}
+    totals = (result.get("totals") or [{}])[0]
+    departments = [{
+        "department": d["_id"],
+        "headcount": d["headcount"],
+        "avg_salary": int(d.get("avg_salary") or 0),
+        "min_salary": d.get("min_salary"),
+        "max_salary": d.get("max_salary"),
+    } for d in result.get("departments", [])]
+    return {
+        "total_employees": totals.get("total", 0),
+        "avg_salary": int(totals.get("avg_salary") or 0),
+        "departments": departments,
+    }
+
+
+@timed("employee_stats")
+def employee_stats(department=None):
+    """
+    Headcount, average salary and per-department breakdown in a single
+    $facet pass over the employees collection.
+    """
+    return shape_employee_stats(next(db.employees.aggregate(employee_stats_pipeline(department)), {}))
+
+
+# Summed over the per-month run summaries (payroll_run.py), not payroll rows
+PENDING_PAYROLL_PIPELINE = [
+    {"$group": {"_id": None, "pending": {"$sum": "$counts.pending"}}},
+]
+
+
+@timed("pending_payroll_count")
+def pending_payroll_count():
+    """Number of payroll rows still pending."""
+    result = list(db.payroll_runs.aggregate(PENDING_PAYROLL_PIPELINE))
+    return result[0]["pending"] if result else 0
+
+
+def dashboard_stats(department=None):
+    """Everything the HR dashboard summary cards need, computed server-side."""
+    stats = employee_stats(department)
+    stats["pending_payroll"] = pending_payroll_count()
+    return stats
@@ -0,0 +1,43 @@
+# conftest.py - Run the suite against the in-process mongomock backend
+#
+#     pip install pytest mongomock && python -m pytest -q tests
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("mongomock")
+
+os.environ["HRIS_MONGO_BACKEND"] = "mongomock"
+os.environ["HRIS_DB_NAME"] = "hris_test"
+os.environ["HRIS_SCHEDULER"] = "0"           # tests run scoring passes themselves
+os.environ["HRIS_LAZY_STARTUP"] = "0"
+os.environ["HRIS_LOG_LEVEL"] = "WARNING"
+os.environ.setdefault("HRIS_MODEL_REGISTRY_DIR", tempfile.mkdtemp(prefix="hris-models-"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    """The shared (mongomock) database, with attendance collections emptied."""
+    from models import db
+    import attendance_rollup
+    for name in ("attendance", "attendance_rollups"):
+        db[name].delete_many({})
+    attendance_rollup.ensure_rollup_indexes()
+    return db
+
+
+@pytest.fixture
+def client():
+    """Flask test client logged in as an HR user (warm-up done)."""
+    import app
+    assert app.models_ready()
+    app.app.config["TESTING"] = True
+    with app.app.test_client() as c:
+        resp = c.post("/login/hr", data={"email": "hr1@company.com", "password": "hrpass1"})
+        assert resp.status_code == 302
+        yield c
@@ -0,0 +1,61 @@
+import random
+
+import attendance_rollup
+
+FIELDS = ("total_present", "total_absent", "absent_streak", "last_date", "absent_30d", "absent_90d")
+
+
+def _rollups(db):
+    return {d["employee_id"]: {f: d.get(f) for f in FIELDS} for d in db.attendance_rollups.find()}
+
+
+def _rebuilt(db):
+    attendance_rollup.rebuild_rollups()
+    return _rollups(db)
+
+
+def test_out_of_order_rows_match_rebuild(db):
+    # Latest day first, then the absences before it (back-fill)
+    for day in ["2025-09-05", "2025-09-04", "2025-09-03", "2025-09-02"]:
+        status = "present" if day == "2025-09-02" else "absent"
+        attendance_rollup.record_attendance([{"employee_id": "E4", "date": day, "status": status}])
+    incremental = _rollups(db)
+    assert incremental["E4"]["absent_streak"] == 3
+    assert incremental == _rebuilt(db)
+
+
+def test_correcting_last_day_recounts_streak(db):
+    days = ["2025-09-01", "2025-09-02", "2025-09-03"]
+    attendance_rollup.record_attendance([{"employee_id": "E5", "date": d, "status": "absent"} for d in days[:2]]
+                                        + [{"employee_id": "E5", "date": days[2], "status": "present"}])
+    assert _rollups(db)["E5"]["absent_streak"] == 0
+    attendance_rollup.record_attendance([{"employee_id": "E5", "date": days[2], "status": "absent"}])
+    incremental = _rollups(db)
+    assert incremental["E5"]["absent_streak"] == 3
+    assert incremental == _rebuilt(db)
+
+
+def test_shuffled_batches_match_rebuild(db):
+    rng = random.Random(7)
+    rows = [{"employee_id": f"E{e}", "date": f"2025-{m:02d}-{d:02d}",
+             "status": "absent" if rng.random() < 0.4 else "present"}
+            for e in range(5) for m in (6, 7, 8, 9) for d in range(1, 29)]
+    rng.shuffle(rows)
+    for i in range(0, len(rows), 37):
+        attendance_rollup.record_attendance(rows[i:i + 37])
+    # Corrections of already-recorded days
+    for r in rng.sample(rows, 40):
+        attendance_rollup.record_attendance([{**r, "status": "absent" if r["status"] == "present" else "present"}])
+    assert _rollups(db) == _rebuilt(db)
+
+
+def test_streak_longer_than_ring_falls_back_to_rebuild(db):
+    from datetime import date, timedelta
+    start = date(2025, 1, 1)
+    rows = [{"employee_id": "E6", "date": (start + timedelta(days=i)).isoformat(), "status": "absent"}
+            for i in range(1, 120)]
+    attendance_rollup.record_attendance(rows)
+    attendance_rollup.record_attendance([{"employee_id": "E6", "date": start.isoformat(), "status": "absent"}])
+    incremental = _rollups(db)
+    assert incremental["E6"]["absent_streak"] == 120
+    assert incremental == _rebuilt(db)
@@ -0,0 +1,34 @@
+# test_bulk_import.py - Imported employees must render on the HR dashboard
+
+import io
+
+
+def test_sparse_employee_row_renders_on_dashboard(client):
+    import bulk_io
+    from models import db
+
+    db.employees.delete_many({"employee_id": "E999"})
+    report = bulk_io.import_stream("employees", io.StringIO("employee_id,name\nE999,New Hire\n"), "csv")
+    assert report["written"] == 1
+
+    emp = db.employees.find_one({"employee_id": "E999"}, {"_id": 0})
+    assert emp["department"] == "Unassigned"
+    assert "salary" not in emp
+
+    resp = client.get("/hr/dashboard?department=Unassigned")
+    assert resp.status_code == 200
+    assert b"E999" in resp.data
+    assert b"Not scored yet" in resp.data
+
+
+def test_defaults_do_not_overwrite_existing_fields():
+    import bulk_io
+    from models import db
+
+    db.employees.update_one({"employee_id": "E998"},
+                            {"$set": {"employee_id": "E998", "name": "Old", "department": "Finance",
+                                      "salary": 50000}}, upsert=True)
+    bulk_io.import_stream("employees", io.StringIO("employee_id,name\nE998,Renamed\n"), "csv")
+
+    emp = db.employees.find_one({"employee_id": "E998"}, {"_id": 0})
+    assert (emp["name"], emp["department"], emp["salary"]) == ("Renamed", "Finance", 50000)
@@ -0,0 +1,47 @@
+# test_forest_compiler.py - Compiled forests: exactness and memory-mapped persistence
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.ensemble import RandomForestClassifier
+
+import forest_compiler
+from model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 100, size=(2000, 4))
+    y = (X[:, 0] + rng.integers(0, 40, size=2000) > 70).astype(int)
+    return RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(X, y), X
+
+
+def test_save_load_is_memory_mapped(model, tmp_path):
+    rf, X = model
+    compiled = forest_compiler.compile_forest(rf, "v0007")
+    compiled.save(str(tmp_path / "compiled"))
+
+    loaded = forest_compiler.CompiledForest.load(str(tmp_path / "compiled"))
+    for name in forest_compiler.CompiledForest.FIELDS:
+        assert isinstance(getattr(loaded, name if name != "classes" else "classes_"), np.memmap)
+    assert (loaded.n_trees, loaded.version) == (10, "v0007")
+    assert np.array_equal(loaded.predict_proba(X), rf.predict_proba(X))
+    assert np.array_equal(loaded.predict(X), rf.predict(X))
+
+
+def test_registry_serves_compiled_directory(model, tmp_path):
+    rf, X = model
+    registry = ModelRegistry("m", root=str(tmp_path), compiler=forest_compiler.CompiledForest,
+                             serve_compiled=True)
+    version = registry.publish(rf)
+    assert os.path.isfile(os.path.join(str(tmp_path), "m", version, "compiled", "masks.npy"))
+
+    served = registry._load(version)
+    assert isinstance(served, forest_compiler.CompiledForest)
+    assert isinstance(served.masks, np.memmap)
+    assert np.array_equal(served.predict_proba(X), rf.predict_proba(X))
@@ -0,0 +1,46 @@
+# test_passwords.py - Bounded bcrypt pool
+
+import asyncio
+import threading
+
+import pytest
+
+from passwords import PasswordPool, PasswordPoolBusy
+
+
+@pytest.fixture
+def pool():
+    p = PasswordPool(workers=1, queue_depth=1, rounds=4)
+    yield p
+    p.shutdown()
+
+
+def test_submit_round_trip(pool):
+    hashed = pool.submit_hash("s3cret").result()
+    assert pool.submit_check(hashed, "s3cret").result() is True
+    assert pool.submit_check(hashed, "wrong").result() is False
+    assert pool.submit_check(None, "s3cret").result() is False
+
+
+def test_submit_fails_fast_when_full(pool):
+    release = threading.Event()
+    held = [pool._submit(release.wait) for _ in range(2)]     # one running, one queued
+    try:
+        with pytest.raises(PasswordPoolBusy):
+            pool.submit_hash("s3cret")
+        with pytest.raises(PasswordPoolBusy):
+            pool.check("$2b$04$invalid", "s3cret")
+        assert pool.rejected == 2
+    finally:
+        release.set()
+    for fut in held:
+        fut.result()
+    assert pool.submit_check(pool.hash("s3cret"), "s3cret").result() is True
+
+
+def test_futures_await_from_asyncio(pool):
+    async def main():
+        hashed = await asyncio.wrap_future(pool.submit_hash("s3cret"))
+        return await asyncio.wrap_future(pool.submit_check(hashed, "s3cret"))
+
+    assert asyncio.run(main()) is True
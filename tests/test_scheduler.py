@@ -0,0 +1,71 @@
+# test_scheduler.py - Scoring passes and what they record for the dashboard
+
+import pytest
+
+
+@pytest.fixture
+def scored():
+    import app
+    assert app.models_ready()
+    from scheduler import Scheduler
+    summary = Scheduler(batch_size=7, concurrency=2).run_once()
+    assert summary is not None
+    return summary
+
+
+def test_risk_counts_match_scores(scored):
+    from models import db
+    from scheduler import ATTRITION_RISK_PROB, last_scoring_run, risk_counts
+
+    scoring = last_scoring_run()
+    emps = {e["employee_id"]: e.get("department") for e in db.employees.find({}, {"_id": 0})}
+    scores = list(db.risk_scores.find({"employee_id": {"$in": list(emps)}}, {"_id": 0}))
+
+    def expected(department=None):
+        rows = [s for s in scores if department is None or emps[s["employee_id"]] == department]
+        return (sum(bool(s.get("payroll_risk")) for s in rows),
+                sum(s.get("attrition_prob", 0.0) > ATTRITION_RISK_PROB for s in rows))
+
+    assert risk_counts(scoring) == expected()
+    for dept in set(emps.values()):
+        assert risk_counts(scoring, dept) == expected(dept)
+    assert risk_counts(scoring, "No Such Department") == (0, 0)
+    assert risk_counts({}) == (0, 0)
+
+
+def test_dashboard_marks_only_unscored_employees(scored, client):
+    from models import db
+
+    resp = client.get("/hr/dashboard")
+    assert resp.status_code == 200
+    assert b"Not scored yet" not in resp.data
+
+    first = db.employees.find_one({}, {"_id": 0, "employee_id": 1}, sort=[("employee_id", 1)])
+    db.risk_scores.delete_one({"employee_id": first["employee_id"]})
+    resp = client.get("/hr/dashboard")
+    assert resp.data.count(b"Not scored yet") == 1
+
+
+@pytest.mark.parametrize("concurrency", [1, 2])
+def test_pass_stops_when_lease_is_lost(scored, monkeypatch, concurrency):
+    import scheduler
+    from models import db
+
+    worker = scheduler.Scheduler(batch_size=2, concurrency=concurrency)
+    scored_batches = []
+    real = scheduler.score_batch
+    monkeypatch.setattr(scheduler, "score_batch",
+                        lambda batch, models: scored_batches.append(1) or real(batch, models))
+
+    def renew():
+        # Another process takes the lease over after the first batch
+        db.scheduler_leases.update_one({"_id": scheduler.LEASE_NAME}, {"$set": {"owner": "someone-else"}})
+        return False
+    monkeypatch.setattr(worker.lease, "renew", renew)
+
+    assert worker.run_once() is None
+    assert "LeaseLost" in worker.last_error and worker.runs == 0
+    assert len(scored_batches) <= 1 + 2 * concurrency < db.employees.count_documents({}) // 2
+    # release() leaves the new holder's lease alone
+    assert db.scheduler_leases.find_one({"_id": scheduler.LEASE_NAME})["owner"] == "someone-else"
+    db.scheduler_leases.delete_one({"_id": scheduler.LEASE_NAME})
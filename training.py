@@ -0,0 +1,101 @@
+# training.py - Shared labels and fitting for both models
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import TRAINING_N_JOBS
+from feature_store import FEATURE_COLUMNS
+
+# Column indexes into the feature matrix
+TENURE, SALARY, PERF, ABSENCE = range(len(FEATURE_COLUMNS))
+
+# Safety fallback datasets (used when fewer than 5 employees exist)
+PAYROLL_FALLBACK = (
+    np.array([[1, 30000, 2, 0], [2, 40000, 3, 1], [3, 60000, 0, 10], [4, 45000, 2, 2],
+              [5, 35000, 3, 0], [6, 75000, 0, 9], [2, 32000, 0, 4], [3, 41000, 2, 1]], dtype=np.int32),
+    np.array([0, 0, 1, 0, 0, 1, 1, 0], dtype=np.uint8),     # 1 = anomaly
+)
+ATTRITION_FALLBACK = (
+    np.array([[0, 28000, 0, 7], [1, 35000, 1, 4], [2, 45000, 2, 2], [3, 60000, 3, 0],
+              [5, 70000, 2, 1], [7, 80000, 3, 0], [1, 32000, 0, 8], [0, 30000, 1, 5]], dtype=np.int32),
+    np.array([1, 1, 0, 0, 0, 0, 1, 1], dtype=np.uint8),
+)
+
+
+# -----------------------------
+# LABEL DEFINITIONS
+# -----------------------------
+def payroll_labels(X, pending):
+    """
+    Payroll anomaly (1) when salary is pending, absences >= 7, very low
+    performance, or low performance paired with a salary above 60000.
+    """
+    perf, salary, absence = X[:, PERF], X[:, SALARY], X[:, ABSENCE]
+    return (pending | (absence >= 7) | (perf == 0) | ((perf <= 1) & (salary > 60000))).astype(np.uint8)
+
+
+def attrition_labels(X):
+    """
+    Attrition risk (1) for tenure <= 1 year, low performance, absences
+    >= 6, or "Below Average" performers on a salary under 35000.
+    """
+    tenure, salary, perf, absence = X[:, TENURE], X[:, SALARY], X[:, PERF], X[:, ABSENCE]
+    return ((tenure <= 1) | (perf == 0) | (absence >= 6) | ((perf == 0) & (salary < 35000))).astype(np.uint8)
+
+
+# -----------------------------
+# FITTING
+# -----------------------------
+def fit_forest(X, y, n_jobs=TRAINING_N_JOBS):
+    """Fit the RandomForest both models use; returns (model, metadata)."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    model = RandomForestClassifier(n_estimators=120,
+                                   max_depth=6,
+                                   random_state=42,
+                                   n_jobs=n_jobs)
+    model.fit(X, y)
+    # Predict single-threaded: thread dispatch per call dominates small batches
+    model.set_params(n_jobs=None)
+    metadata = {
+        "rows": int(len(X)),
+        "features": list(FEATURE_COLUMNS),
+        "metrics": {
+            "train_accuracy": round(float(model.score(X, y)), 4),
+            "positive_rate": round(float(y.sum()) / max(1, len(y)), 4),
+        },
+    }
+    return model, metadata
+
+
+def fit_payroll(X, pending, n_jobs=TRAINING_N_JOBS):
+    if len(X) < 5:
+        return fit_forest(*PAYROLL_FALLBACK, n_jobs=n_jobs)
+    return fit_forest(X, payroll_labels(X, pending), n_jobs=n_jobs)
+
+
+def fit_attrition(X, n_jobs=TRAINING_N_JOBS):
+    if len(X) < 5:
+        return fit_forest(*ATTRITION_FALLBACK, n_jobs=n_jobs)
+    return fit_forest(X, attrition_labels(X), n_jobs=n_jobs)
+
+
+def fit_both(X, pending, parallel=False, n_jobs=TRAINING_N_JOBS):
+    """
+    Fit both models from the same feature matrix. With parallel=True each
+    model is fitted in its own process, splitting the cores between them.
+    Returns ((payroll_model, meta), (attrition_model, meta)).
+    """
+    if not parallel:
+        return fit_payroll(X, pending, n_jobs), fit_attrition(X, n_jobs)
+
+    cores = os.cpu_count() or 2
+    per_proc = max(1, (cores if n_jobs == -1 else n_jobs) // 2)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=ctx) as pool:
+        payroll = pool.submit(fit_payroll, X, pending, per_proc)
+        attrition = pool.submit(fit_attrition, X, per_proc)
+        return payroll.result(), attrition.result()
@@ -0,0 +1,80 @@
+# triggers.py - Deduplicated, batched trigger (alert) pipeline
+
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from config import TRIGGER_COOLDOWN_SECONDS
+from models import db
+from db_metrics import timed
+from logs import get_logger
+
+log = get_logger("triggers")
+
+
+def ensure_trigger_indexes():
+    """Dedupe key per cooldown window + timestamp index for the recent feed."""
+    db.triggers.create_index(
+        [("employee_id", 1), ("event_type", 1), ("window", 1)],
+        unique=True,
+        partialFilterExpression={"window": {"$exists": True}},
+    )
+    db.triggers.create_index([("timestamp", DESCENDING)])
+
+
+class TriggerEngine:
+    """
+    Collects trigger events during a scoring pass and writes them in one
+    unordered bulk upsert. An (employee_id, event_type) pair is stored at
+    most once per cooldown window, so repeated passes don't rewrite it.
+    """
+
+    def __init__(self, cooldown_seconds=TRIGGER_COOLDOWN_SECONDS):
+        self.cooldown_seconds = max(1, int(cooldown_seconds))
+        self._events = {}
+
+    def add(self, event_type, message, employee_id=None):
+        key = (employee_id, event_type)
+        if key not in self._events:
+            self._events[key] = message
+
+    def __len__(self):
+        return len(self._events)
+
+    def flush(self):
+        """Write collected events; returns how many were new."""
+        if not self._events:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        window = int(now.timestamp()) // self.cooldown_seconds
+        timestamp = now.isoformat()
+
+        ops = []
+        for (employee_id, event_type), message in self._events.items():
+            key = {"employee_id": employee_id, "event_type": event_type, "window": window}
+            ops.append(UpdateOne(
+                key,
+                {"$setOnInsert": {**key, "message": message, "timestamp": timestamp}},
+                upsert=True,
+            ))
+        self._events = {}
+
+        try:
+            fired = db.triggers.bulk_write(ops, ordered=False).upserted_count
+        except BulkWriteError as e:
+            # Duplicate key: a concurrent flush already stored that event this window
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+            fired = e.details.get("nUpserted", 0)
+        if fired:
+            log.info(f"⚡ {fired} trigger(s) fired", extra={"fields": {
+                "fired": fired, "events": len(ops), "window": window}})
+        return fired
+
+
+@timed("get_recent_triggers")
+def get_recent_triggers(limit=10):
+    """Get the most recent triggers (served by the timestamp index)."""
+    return list(db.triggers.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit))
@@ -0,0 +1,85 @@
+# warmup.py - Background warm-up (seeding + model loading) for lazy startup
+
+import threading
+import time
+import traceback
+
+from config import WARMUP_RETRIES, WARMUP_RETRY_BACKOFF_SECONDS, WARMUP_RETRY_MAX_SECONDS
+
+
+class Warmup:
+    """
+    Runs a warm-up function, either inline or on a daemon thread, and lets
+    request handlers wait for it with a timeout. Failures are retried with
+    bounded backoff; if every retry fails, the next start()/wait() runs it
+    again, so a dependency that comes up late doesn't need a restart.
+    """
+
+    def __init__(self, fn, retries=WARMUP_RETRIES, backoff=WARMUP_RETRY_BACKOFF_SECONDS,
+                 max_backoff=WARMUP_RETRY_MAX_SECONDS):
+        self._fn = fn
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+        self.error = None
+        self.attempts = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def _run(self):
+        self.started_at = time.time()
+        try:
+            for attempt in range(self.retries + 1):
+                self.attempts += 1
+                try:
+                    self._fn()
+                    self.error = None
+                    return
+                except Exception as e:
+                    self.error = e
+                    print(f"❌ Warm-up failed (attempt {self.attempts}):", e)
+                    traceback.print_exc()
+                if attempt < self.retries:
+                    time.sleep(min(self.max_backoff, self.backoff * 2 ** attempt))
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def start(self, background=True):
+        """Start warming up (no-op if already started, unless the last run failed)."""
+        with self._lock:
+            if self._started and not self.failed:
+                return
+            self._started = True
+            self._done.clear()
+        if background:
+            threading.Thread(target=self._run, name="hris-warmup", daemon=True).start()
+        else:
+            self._run()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    @property
+    def failed(self):
+        """The last run gave up after all its retries."""
+        return self._done.is_set() and self.error is not None
+
+    def wait(self, timeout=None):
+        """Block until warm-up finished; True if it finished successfully."""
+        self.start()
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        if self.failed:
+            return "failed"
+        if self._done.is_set():
+            return "ready"
+        if self.error is not None:
+            return "retrying"
+        return "warming up" if self._started else "idle"